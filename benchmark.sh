@@ -0,0 +1,4 @@
+#!/bin/bash
+
+source .env/bin/activate
+python3 benchmarks/benchmark.py "$@"
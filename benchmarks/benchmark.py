@@ -0,0 +1,354 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import processing
+from datasets import AxisTicks
+
+# Parameters of the synthetic inputs for each size.
+#   side: side of the door combination matrix (heatmaps/contours) and of the environment.
+#   replicates: number of replicates in each line of a data file.
+#   data_files/points: number of data files of a configuration file and number of lines of each one.
+SIZES = {
+    "small": {"side": 30, "replicates": 20, "data_files": 4, "points": 20},
+    "medium": {"side": 100, "replicates": 100, "data_files": 16, "points": 100},
+    "large": {"side": 300, "replicates": 200, "data_files": 64, "points": 400},
+}
+DERIVED_SERIES = 500 # number of series of the derived-series benchmark, built by repeating the data sets of the configuration file
+
+def creating_arg_parser():
+
+    description = 'Benchmarks the processing and plotting functions with synthetic inputs of different sizes.'
+
+    parser = argparse.ArgumentParser(description=description)
+
+    parser.add_argument('--sizes', nargs="+", choices=list(SIZES), default=["small", "medium"], help="Sizes of the synthetic inputs. Defaults to small and medium.")
+    parser.add_argument('--repeat', nargs=1, type=int, default=[3], help="Number of timed runs of each benchmark. The median is reported. Defaults to 3.")
+    parser.add_argument('--only', choices=["processing", "plotting"], help="Only run the processing or the plotting benchmarks.")
+    parser.add_argument('-o', '--out', nargs=1, default=["benchmark_results.json"], help="JSON file where the results are saved. Defaults to benchmark_results.json.")
+    parser.add_argument('--baseline', nargs=1, help="JSON file with previous results, to which the current results are compared.")
+    parser.add_argument('--seed', nargs=1, type=int, default=[0], help="Seed of the synthetic input generators.")
+
+    return parser
+
+def generate_heatmap_data_file(filename, side, replicates, rng):
+    """
+        Generate a door combination data file, as used by heatmap and contours graphics.
+
+        Args:
+            filename (str): Name of the generated file.
+            side (int): The file contains side * side lines, one for each combination of doors.
+            replicates (int): Number of replicates in each line.
+            rng (np.random.Generator): Random number generator.
+        Returns:
+            None
+
+        Note:
+            The lines of the diagonal (a single door) begin with '#1' and about 1% of the lines contain -1 (inaccessible door).
+    """
+
+    with open(filename, "w") as file:
+        file.write("./synthetic.sh --benchmark\n")
+        file.write("-" * 62 + "\n\n")
+
+        for door_a in range(side):
+            for door_b in range(side):
+                values = rng.integers(100, 300, replicates)
+                if rng.random() < 0.01:
+                    values[0] = -1
+
+                prefix = "#1 " if door_a == door_b else ""
+                file.write(prefix + " ".join(map(str, values)) + " \n")
+
+def generate_env_heatmap_file(filename, side, rng):
+    """
+        Generate an environment heatmap file with axis ticks, walls on the borders, an exit and some obstacles.
+
+        Args:
+            filename (str): Name of the generated file.
+            side (int): Number of lines and columns of the environment.
+            rng (np.random.Generator): Random number generator.
+        Returns:
+            None
+    """
+
+    rows, columns = np.indices((side, side))
+    data = np.hypot(rows, columns - side / 2) * 1.5
+    data[[0, -1], :] = 1000
+    data[:, [0, -1]] = 1000
+    data[0, side // 2] = 0 # exit
+    obstacles = rng.random((side, side)) < 0.02
+    data[obstacles] = 1000
+
+    ticks = " ".join(str(t) for t in range(0, side, max(1, side // 5)))
+    with open(filename, "w") as file:
+        file.write(f"{ticks}\n{ticks}\n{ticks}\n{ticks}\n\n\n")
+        for line in data:
+            file.write(" ".join(f"{v:.1f}" for v in line) + "\n")
+
+def generate_experimental_data_file(filename, points, replicates, rng):
+    """
+        Generate an experiment data file with POINTS lines of REPLICATES timesteps, each line prefixed by its *value.
+    """
+
+    with open(filename, "w") as file:
+        file.write("./synthetic.sh --benchmark\n")
+        file.write("-" * 62 + "\n\n")
+
+        for point in range(points):
+            values = rng.integers(100, 300, replicates)
+            file.write(f"*{point / 10} " + " ".join(map(str, values)) + "\n")
+
+def generate_configuration_file(directory, data_files, points, replicates, rng):
+    """
+        Generate a configuration file and the DATA_FILES experiment data files it references.
+
+        Returns:
+            str: The name of the configuration file.
+    """
+
+    filename = os.path.join(directory, "configuration.txt")
+
+    with open(filename, "w") as file:
+        file.write(" ".join(str(t) for t in range(0, points, max(1, points // 5))) + "\n\n\n\n")
+
+        for index in range(data_files):
+            data_file = f"data_{index}.txt"
+            generate_experimental_data_file(os.path.join(directory, data_file), points, replicates, rng)
+            file.write(f"{data_file} N={10 * (index + 1)}\n")
+
+    return filename
+
+def generate_inputs(directory, size, rng):
+    """
+        Generate every synthetic input of the given size inside DIRECTORY.
+
+        Returns:
+            dict: The names of the generated files, keyed by kind of input.
+    """
+
+    parameters = SIZES[size]
+    size_directory = os.path.join(directory, size)
+    os.makedirs(size_directory)
+
+    inputs = {
+        "heatmap": os.path.join(size_directory, "heatmap.txt"),
+        "environment": os.path.join(size_directory, "environment.txt"),
+        "configuration": generate_configuration_file(size_directory, parameters["data_files"], parameters["points"], parameters["replicates"], rng),
+    }
+
+    generate_heatmap_data_file(inputs["heatmap"], parameters["side"], parameters["replicates"], rng)
+    generate_env_heatmap_file(inputs["environment"], parameters["side"], rng)
+
+    for kind in ("heatmap", "environment"):
+        for extension, (_, open_function) in processing.COMPRESSION_FORMATS.items():
+            inputs[kind + extension] = inputs[kind] + extension
+            with open(inputs[kind], "rb") as source, open_function(inputs[kind + extension], "wb") as destination:
+                destination.write(source.read())
+
+    return inputs
+
+def measure(function, repeat):
+    """
+        Time a function and measure its peak memory.
+
+        The peak memory is measured by tracemalloc in an extra, untimed run, since tracing slows down the execution.
+
+        Args:
+            function (callable): The function to be measured, without arguments.
+            repeat (int): Number of timed runs.
+        Returns:
+            dict: The median and minimum wall time, in seconds, and the peak memory, in bytes.
+    """
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+        cleanup_figures()
+
+    tracemalloc.start()
+    function()
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    cleanup_figures()
+
+    return {"seconds": statistics.median(times), "min_seconds": min(times), "peak_memory_bytes": peak_memory}
+
+def cleanup_figures():
+    """
+        Close the figures created by the plotting benchmarks, if pyplot was imported.
+    """
+
+    if "matplotlib.pyplot" in sys.modules:
+        sys.modules["matplotlib.pyplot"].close("all")
+
+def processing_benchmarks(inputs):
+    """
+        List the processing benchmarks.
+
+        Returns:
+            list: 4-tuples with the name of the benchmark, the function to be measured, the amount of work and its unit.
+    """
+
+    configuration_files = processing.get_configuration_data_files(inputs["configuration"])
+    configuration_bytes = os.path.getsize(inputs["configuration"]) + sum(os.path.getsize(f) for f in configuration_files)
+    megabytes = lambda filename: os.path.getsize(filename) / 2 ** 20
+
+    # hundreds of series, derived as in a configuration file with one N=value legend per data set
+    data_vector = list(processing.process_configuration_file(inputs["configuration"]).data_vector)
+    series = data_vector * (DERIVED_SERIES // len(data_vector) + 1)
+    series = series[:DERIVED_SERIES]
+    legends = [f"N={number}" for number in range(1, DERIVED_SERIES + 1)]
+    operations = processing.parse_derive_operations("difference,quotient:N,normalize")
+
+    return [
+        ("processing.process_heatmap_data", lambda: processing.process_heatmap_data(inputs["heatmap"], True, "int", True), megabytes(inputs["heatmap"]), "MB"),
+        ("processing.process_env_heatmap_data", lambda: processing.process_env_heatmap_data(inputs["environment"], 1000.0, "2d", True), megabytes(inputs["environment"]), "MB"),
+        *[(f"processing.process_heatmap_data[{extension}]", lambda extension=extension: processing.process_heatmap_data(inputs["heatmap" + extension], True, "int", True), megabytes(inputs["heatmap"]), "MB")
+          for extension in processing.COMPRESSION_FORMATS],
+        *[(f"processing.process_env_heatmap_data[{extension}]", lambda extension=extension: processing.process_env_heatmap_data(inputs["environment" + extension], 1000.0, "2d", True), megabytes(inputs["environment"]), "MB")
+          for extension in processing.COMPRESSION_FORMATS],
+        *[(f"processing.process_env_heatmap_data[{dtype}]", lambda dtype=dtype: processing.process_env_heatmap_data(inputs["environment"], 1000.0, "2d", True, dtype), megabytes(inputs["environment"]), "MB")
+          for dtype in ("int32", "float32")],
+        ("processing.process_experimental_data_file", lambda: processing.process_experimental_data_file(configuration_files[0]), megabytes(configuration_files[0]), "MB"),
+        ("processing.stream_experimental_data_statistics", lambda: processing.stream_experimental_data_statistics(configuration_files[0]), megabytes(configuration_files[0]), "MB"),
+        ("processing.process_configuration_file", lambda: processing.process_configuration_file(inputs["configuration"]), configuration_bytes / 2 ** 20, "MB"),
+        ("processing.derive_data_sets", lambda: processing.derive_data_sets(legends, series, operations), DERIVED_SERIES, "series"),
+    ]
+
+def plotting_benchmarks(inputs):
+    """
+        List the plotting benchmarks. The inputs are parsed once, before the measurements.
+
+        Returns:
+            list: 4-tuples with the name of the benchmark, the function to be measured, the amount of work and its unit.
+    """
+
+    import plotting
+
+    environment_data = processing.process_env_heatmap_data(inputs["environment"], 1000.0, "3d", True)
+    x_ticks, y_ticks, z_ticks = environment_data.x_axis_ticks, environment_data.y_axis_ticks, environment_data.z_axis_ticks
+    environment, maximum_value = environment_data.matrix, environment_data.maximum_value
+    heatmap_data = processing.process_heatmap_data(inputs["heatmap"], True, "int", True)
+    heatmap, min_max_values = heatmap_data.matrix, heatmap_data.min_max_values
+    configuration = processing.process_configuration_file(inputs["configuration"])
+    x_axis_ticks, y_axis_ticks, legends, data_vector = configuration.x_axis_ticks, configuration.y_axis_ticks, configuration.legends, configuration.data_vector
+    labels = ["Benchmark", "x", "y"]
+    points = int(data_vector.lengths.sum())
+    scatter_x_ticks = AxisTicks(np.arange(len(data_vector[0]), dtype=float), ()) # a scatter graphic requires one x location per point
+    levels = plotting.get_levels(min_max_values, "int")
+
+    def trace_contours():
+        plotting.contour_geometries.clear() # every run must trace the contours
+        plotting.trace_contours(heatmap, levels)
+
+    def plot_contours_graphic():
+        plotting.contour_geometries.clear()
+        plotting.plot_contours_graphic(heatmap, min_max_values, "out/contours.png", labels, "int")
+
+    return [
+        ("plotting.plot_heatmap", lambda: plotting.plot_heatmap(x_ticks, y_ticks, environment, (0, maximum_value), "out/heatmap.png", labels, over_value_color="white", origin="upper"), environment.size, "cells"),
+        ("plotting.plot_3d_heatmap", lambda: plotting.plot_3d_heatmap(x_ticks, y_ticks, z_ticks, environment, (0, maximum_value), "out/heatmap_3d.png", labels, over_value_color="none"), environment.size, "cells"),
+        ("plotting.trace_contours", trace_contours, heatmap.size, "cells"),
+        ("plotting.plot_contours_graphic", plot_contours_graphic, heatmap.size, "cells"),
+        ("plotting.plot_line_graphic", lambda: plotting.plot_line_graphic(x_axis_ticks, y_axis_ticks, list(legends), data_vector, "out/line.png", labels, False, False), points, "points"),
+        ("plotting.plot_scatter_graphic", lambda: plotting.plot_scatter_graphic(scatter_x_ticks, y_axis_ticks, list(legends), data_vector, "out/scatter.png", labels), len(data_vector[0]), "points"),
+    ]
+
+def compare_with_baseline(results, baseline_file):
+    """
+        Print the ratio between the current and the baseline wall time of each benchmark found in both.
+    """
+
+    with open(baseline_file) as file:
+        baseline = {(r["name"], r["size"]): r for r in json.load(file)["results"]}
+
+    print(f"\nComparison with {baseline_file} (ratio < 1 means faster):")
+    for result in results:
+        previous = baseline.get((result["name"], result["size"]))
+        if previous is None:
+            continue
+
+        ratio = result["seconds"] / previous["seconds"] if previous["seconds"] > 0 else float("inf")
+        memory_ratio = result["peak_memory_bytes"] / previous["peak_memory_bytes"] if previous["peak_memory_bytes"] > 0 else float("inf")
+        print(f"  {result['name']:<50} {result['size']:<7} time x{ratio:.2f}  memory x{memory_ratio:.2f}")
+
+def run_benchmarks(command_line):
+    """
+        Generate the synthetic inputs, run the selected benchmarks and print their results.
+
+        Returns:
+            list: The result of each benchmark.
+    """
+
+    rng = np.random.default_rng(command_line.seed[0])
+    results = []
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.makedirs(os.path.join(directory, "out")) # the plotting functions save into out/
+        current_directory = os.getcwd()
+        os.chdir(directory)
+
+        try:
+            for size in command_line.sizes:
+                inputs = generate_inputs(directory, size, rng)
+
+                benchmarks = []
+                if command_line.only in (None, "processing"):
+                    benchmarks += processing_benchmarks(inputs)
+                if command_line.only in (None, "plotting"):
+                    benchmarks += plotting_benchmarks(inputs)
+
+                for name, function, work, unit in benchmarks:
+                    result = {"name": name, "size": size, "parameters": SIZES[size]}
+                    result.update(measure(function, command_line.repeat[0]))
+                    result["throughput"] = work / result["seconds"] if result["seconds"] > 0 else None
+                    result["throughput_unit"] = f"{unit}/s"
+                    results.append(result)
+
+                    print(f"{name:<50} {size:<7} {result['seconds']:9.4f} s  {result['throughput']:14.1f} {result['throughput_unit']:<9} peak {result['peak_memory_bytes'] / 2 ** 20:8.1f} MB")
+        finally:
+            os.chdir(current_directory)
+
+    return results
+
+if __name__ == "__main__":
+    command_line = creating_arg_parser().parse_args()
+
+    import matplotlib
+    matplotlib.use("Agg")
+    processing.configure_cache(enabled=False) # every run must parse the inputs
+
+    results = run_benchmarks(command_line)
+
+    report = {
+        "metadata": {
+            "timestamp": time.strftime('%Y-%m-%d_%H:%M:%S'),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "matplotlib": matplotlib.__version__,
+            "platform": platform.platform(),
+            "repeat": command_line.repeat[0],
+            "seed": command_line.seed[0],
+        },
+        "results": results,
+    }
+    with open(command_line.out[0], "w") as file:
+        json.dump(report, file, indent=4)
+
+    print(f"Results saved to {command_line.out[0]}")
+
+    if command_line.baseline is not None:
+        compare_with_baseline(results, command_line.baseline[0])
@@ -0,0 +1,104 @@
+import os
+
+from PIL import Image
+
+def write_frames(filename, frames, image_format, duration):
+    """
+        Write an animation of IMAGE_FORMAT with Pillow, looping forever. Every frame is kept in memory until the animation is written,
+        since Pillow reads the frames more than once.
+
+        Args:
+            filename (str | file): The name of the animation file, or a binary file object.
+            frames (iterable): The frames, as PIL images of the same size.
+            image_format (str): The format of the animation, GIF or PNG (animated PNG).
+            duration (int): The time each frame is displayed, in milliseconds.
+        Returns:
+            None
+        Raises:
+            ValueError: If there are no frames.
+    """
+
+    frames = list(frames)
+    if not frames:
+        raise ValueError("An animation needs at least one frame.")
+
+    frames[0].save(filename, format=image_format, save_all=True, append_images=frames[1:], duration=duration, loop=0)
+
+def write_apng(filename, frames, duration):
+    """
+        Write an animated PNG.
+
+        Args:
+            filename (str | file): The name of the animated PNG file, or a binary file object.
+            frames (iterator): The frames, as RGB PIL images of the same size. Consumed lazily.
+            duration (int): The time each frame is displayed, in milliseconds.
+        Returns:
+            None
+    """
+
+    write_frames(filename, frames, "PNG", duration)
+
+def write_gif(filename, frames, duration):
+    """
+        Write an animated GIF. Each frame is reduced to its own palette of 256 colors.
+
+        Args:
+            filename (str | file): The name of the GIF file, or a binary file object.
+            frames (iterator): The frames, as RGB PIL images of the same size. Consumed lazily.
+            duration (int): The time each frame is displayed, in milliseconds.
+        Returns:
+            None
+    """
+
+    write_frames(filename, (frame.quantize(256) for frame in frames), "GIF", duration)
+
+def write_numbered_frames(directory, frames):
+    """
+        Write each frame as a PNG file named frame_<number>.png inside DIRECTORY, which is created if needed.
+
+        Args:
+            directory (str): The directory of the frames.
+            frames (iterator): The frames, as PIL images. Consumed lazily.
+        Returns:
+            None
+    """
+
+    os.makedirs(directory, exist_ok=True)
+
+    for frame_number, frame in enumerate(frames):
+        frame.save(os.path.join(directory, f"frame_{frame_number:05d}.png"))
+
+def write_animation(output_file, frames, duration, animation_format=None):
+    """
+        Write the frames of an animation in the format selected by the extension of OUTPUT_FILE: an animated GIF (.gif), an animated PNG
+        (.png or .apng) or, for any other name, numbered PNG frames inside the directory OUTPUT_FILE.
+
+        Args:
+            output_file (str | file): The name of the animation file, or of the directory of the frames. A binary file object can be given along with ANIMATION_FORMAT.
+            frames (iterator): The frames, as RGB PIL images of the same size. Consumed lazily.
+            duration (int): The time each frame is displayed, in milliseconds.
+            animation_format (str | None): The format of the animation (gif, png or apng), used instead of the extension of OUTPUT_FILE.
+        Returns:
+            None
+    """
+
+    extension = f".{animation_format.lower()}" if animation_format is not None else os.path.splitext(output_file)[1].lower()
+
+    if extension == ".gif":
+        write_gif(output_file, frames, duration)
+    elif extension in (".png", ".apng"):
+        write_apng(output_file, frames, duration)
+    else:
+        write_numbered_frames(output_file, frames)
+
+def canvas_to_image(canvas):
+    """
+        Return the pixels last drawn into a canvas as an RGB PIL image.
+
+        Args:
+            canvas (FigureCanvasAgg): The Agg canvas of a figure.
+        Returns:
+            Image: The drawn figure.
+    """
+
+    return Image.frombuffer("RGBA", canvas.get_width_height(), canvas.buffer_rgba(), "raw", "RGBA", 0, 1).convert("RGB")
@@ -0,0 +1,321 @@
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+import processing
+import profiling
+from datasets import DTYPES, AnimationData, AxisTicks, ConfigurationData, DataSets, EnvironmentHeatmapData, GridData, HeatmapData # re-exported for library users
+from errors import InvalidOptionError, PlotterError
+
+GRAPHICS = ("environment_heatmap", "3d_environment_heatmap", "heatmap", "int_contours", "float_contours", "line_graphic",
+            "scatter_graphic", "varas_door_width_7", "varas_door_width_9", "environment_heatmap_animation")
+CONFIGURATION_GRAPHICS = ("line_graphic", "scatter_graphic", "varas_door_width_7", "varas_door_width_9")
+DERIVED_GRAPHICS = { # graphics that plot series derived from their data sets (see processing.derive_data_sets)
+    "varas_door_width_7": "difference", # Tu - Te, Fig. 7 of (VARAS, 2007)
+    "varas_door_width_9": "quotient:N", # T/N, Fig. 9 of (VARAS, 2007)
+}
+GRID_GRAPHICS = ("environment_heatmap", "heatmap", "int_contours", "float_contours") # graphics that can be drawn as a grid of panels from several inputs
+GRID_PARSING_THREADS = 8 # maximum number of panels of a grid parsed concurrently
+
+def parse_environment_heatmap(filename, wall_threshold=1000.0, dimension="2d", suppress_heatmap_exits=False, dtype="float64"):
+    """
+        Parse an environment heatmap file.
+
+        Args:
+            filename (str): The name of the environment heatmap file.
+            wall_threshold (float): Threshold from which a cell is considered a wall.
+            dimension (str): The dimension of the graphic ('2d' or '3d'). The z-axis ticks are only kept for '3d'.
+            suppress_heatmap_exits (bool): Suppress the exits located on the edges of the environment.
+            dtype (str): The type of the matrix, one of DTYPES.
+        Returns:
+            EnvironmentHeatmapData: The ticks, the matrix and its maximum value (ignoring walls).
+        Raises:
+            InputNotFoundError, InvalidDataError: see processing.process_env_heatmap_data.
+    """
+
+    return processing.process_env_heatmap_data(filename, wall_threshold, dimension, suppress_heatmap_exits, dtype)
+
+def parse_heatmap(filename, data_type="int", ignore_marked_data=False, force_over_values=False, dtype="float64"):
+    """
+        Parse a data file (or binary data store) into the square matrix of a heatmap or contour graphic.
+
+        Args:
+            filename (str): The name of the data file.
+            data_type (str): The type of the data ('int' or 'float').
+            ignore_marked_data (bool): Ignore data on lines beginning with #1 when calculating min/max.
+            force_over_values (bool): Force over values on lines beginning with #1 to be colored dark red.
+            dtype (str): The type of the matrix, one of DTYPES.
+        Returns:
+            HeatmapData: The matrix and its minimum and maximum values.
+        Raises:
+            InvalidOptionError, InputNotFoundError, InvalidDataError: see processing.process_heatmap_data.
+    """
+
+    return processing.process_heatmap_data(filename, ignore_marked_data, data_type, force_over_values, dtype)
+
+def parse_configuration(filename, dtype="float64"):
+    """
+        Parse a configuration file and every data file referenced by it.
+
+        Args:
+            filename (str): The name of the configuration file.
+            dtype (str): The type of the means of the data sets, one of DTYPES.
+        Returns:
+            ConfigurationData: The ticks, the legends, the mean of each line of each data set and their statistics.
+        Raises:
+            InputNotFoundError, InvalidDataError: see processing.process_configuration_file.
+    """
+
+    return processing.process_configuration_file(filename, dtype)
+
+def parse_animation(frames, wall_threshold=1000.0, suppress_heatmap_exits=False, dtype="float64"):
+    """
+        List the environment heatmap files of an animation and determine the maximum value of every frame, which fixes the color scale.
+        Each file is parsed without keeping the frames in memory.
+
+        Args:
+            frames (str): A listing file or a glob pattern (see processing.get_animation_frame_files).
+            wall_threshold (float): Threshold from which a cell is considered a wall.
+            suppress_heatmap_exits (bool): Suppress the exits located on the edges of the environment.
+            dtype (str): The type of the matrices of the frames, one of DTYPES.
+        Returns:
+            AnimationData: The frame files, their maximum value and the options used to parse them again while they are drawn.
+        Raises:
+            InvalidOptionError: If no file is found.
+            InputNotFoundError, InvalidDataError: see processing.process_env_heatmap_data.
+    """
+
+    frame_files = processing.get_animation_frame_files(frames)
+    if not frame_files:
+        raise InvalidOptionError(f"No environment heatmap file found for {frames}.")
+
+    maximum_value = max(processing.process_env_heatmap_data(frame_file, wall_threshold, "2d", suppress_heatmap_exits, dtype).maximum_value for frame_file in frame_files)
+
+    return AnimationData(frame_files, maximum_value, wall_threshold, suppress_heatmap_exits, dtype)
+
+def parse_grid(graphic, input_files, ignore_marked_data=False, force_over_values=False, suppress_heatmap_exits=False, wall_threshold=1000.0, dtype="float64"):
+    """
+        Parse the input files of the panels of a grid, concurrently by up to GRID_PARSING_THREADS threads, and determine the minimum and
+        maximum values across every panel, which fix the color scale (and the contour levels) shared by the panels.
+
+        Args:
+            graphic (str): The graphic drawn in each panel. One of GRID_GRAPHICS.
+            input_files (list): The input file of each panel.
+            ignore_marked_data, force_over_values, suppress_heatmap_exits, wall_threshold, dtype: see render.
+        Returns:
+            GridData: The parsed data of each panel, in the order of the input files, and the shared minimum and maximum values.
+        Raises:
+            InvalidOptionError: If the graphic can't be drawn as a grid.
+            InputNotFoundError, InvalidDataError: see parse.
+    """
+
+    if graphic not in GRID_GRAPHICS:
+        raise InvalidOptionError(f"The {graphic} graphic can't be drawn from several inputs. Graphics drawn as a grid of panels: {', '.join(GRID_GRAPHICS)}.")
+
+    with ThreadPoolExecutor(max_workers=max(1, min(GRID_PARSING_THREADS, len(input_files)))) as executor:
+        futures = [executor.submit(parse, graphic, input_file, ignore_marked_data, force_over_values, suppress_heatmap_exits, wall_threshold, dtype)
+                   for input_file in input_files]
+
+        try:
+            panels = [future.result() for future in futures] # collected in the order of the inputs
+        except PlotterError:
+            executor.shutdown(wait=False, cancel_futures=True) # the panels not yet being parsed are never parsed
+            raise
+
+    if graphic == "environment_heatmap":
+        min_max_values = (0, max(panel.maximum_value for panel in panels))
+    else:
+        min_max_values = (min(panel.min_max_values[0] for panel in panels), max(panel.min_max_values[1] for panel in panels))
+
+    return GridData(panels, min_max_values)
+
+def parse(graphic, input_file, ignore_marked_data=False, force_over_values=False, suppress_heatmap_exits=False, wall_threshold=1000.0, dtype="float64"):
+    """
+        Parse the input file of a graphic into the data object expected by render_data.
+
+        Args:
+            graphic (str): The graphic to be generated. One of GRAPHICS.
+            input_file (str | list): The name of the data file, configuration file or, for animations, the listing file or glob pattern.
+                                     A list of several files is parsed into the panels of a grid (see parse_grid).
+            ignore_marked_data, force_over_values, suppress_heatmap_exits, wall_threshold, dtype: see render.
+        Returns:
+            EnvironmentHeatmapData | HeatmapData | ConfigurationData | AnimationData | GridData: the parsed data.
+        Raises:
+            InvalidOptionError: If the graphic is unknown.
+    """
+
+    if isinstance(input_file, (list, tuple)):
+        if len(input_file) > 1:
+            return parse_grid(graphic, input_file, ignore_marked_data, force_over_values, suppress_heatmap_exits, wall_threshold, dtype)
+
+        input_file, = input_file
+
+    if graphic in ("environment_heatmap", "3d_environment_heatmap"):
+        return parse_environment_heatmap(input_file, wall_threshold, "3d" if graphic == "3d_environment_heatmap" else "2d", suppress_heatmap_exits, dtype)
+    if graphic in ("heatmap", "int_contours", "float_contours"):
+        return parse_heatmap(input_file, "float" if graphic == "float_contours" else "int", ignore_marked_data, force_over_values, dtype)
+    if graphic in CONFIGURATION_GRAPHICS:
+        return parse_configuration(input_file, dtype)
+    if graphic == "environment_heatmap_animation":
+        return parse_animation(input_file, wall_threshold, suppress_heatmap_exits, dtype)
+
+    raise InvalidOptionError(f"Invalid graphic: {graphic}.")
+
+def draw(graphic, data, output, labels, no_marker, full_resolution, frame_duration, error_band, derive, image_format, grid_columns, panel_titles):
+    """
+        Plot a graphic from its parsed data into OUTPUT (a path or a file object). See render_data.
+    """
+
+    import plotting  # imported only when needed, since it imports matplotlib
+
+    if isinstance(data, GridData):
+        if panel_titles is None:
+            panel_titles = [f"({chr(ord('a') + index % 26)})" for index in range(len(data.panels))]
+        elif len(panel_titles) != len(data.panels):
+            raise InvalidOptionError(f"{len(panel_titles)} panel titles were given for {len(data.panels)} panels.")
+
+        if graphic == "environment_heatmap":
+            panels = [(panel.x_axis_ticks, panel.y_axis_ticks, panel.matrix) for panel in data.panels]
+            plotting.plot_heatmap_grid(panels, data.min_max_values, output, labels, panel_titles, grid_columns, over_value_color="white", origin="upper", full_resolution=full_resolution)
+        elif graphic == "heatmap":
+            panels = [(AxisTicks.empty(), AxisTicks.empty(), panel.matrix) for panel in data.panels]
+            plotting.plot_heatmap_grid(panels, data.min_max_values, output, labels, panel_titles, grid_columns, full_resolution=full_resolution)
+        else:
+            plotting.plot_contours_grid([panel.matrix for panel in data.panels], data.min_max_values, output, labels, panel_titles, grid_columns, graphic.split("_")[0])
+    elif graphic == "environment_heatmap":
+        plotting.plot_heatmap(data.x_axis_ticks, data.y_axis_ticks, data.matrix, (0, data.maximum_value), output, labels, over_value_color="white", origin="upper", full_resolution=full_resolution)
+    elif graphic == "3d_environment_heatmap":
+        plotting.plot_3d_heatmap(data.x_axis_ticks, data.y_axis_ticks, data.z_axis_ticks, data.matrix, (0, data.maximum_value), output, labels, over_value_color="none", full_resolution=full_resolution)
+    elif graphic == "heatmap":
+        plotting.plot_heatmap(AxisTicks.empty(), AxisTicks.empty(), data.matrix, data.min_max_values, output, labels, full_resolution=full_resolution)
+    elif graphic in ("int_contours", "float_contours"):
+        plotting.plot_contours_graphic(data.matrix, data.min_max_values, output, labels, graphic.split("_")[0])
+    elif graphic in CONFIGURATION_GRAPHICS:
+        legends, data_vector = list(data.legends), data.data_vector
+
+        operations = processing.parse_derive_operations(DERIVED_GRAPHICS[graphic]) if graphic in DERIVED_GRAPHICS else []
+        if derive is not None:
+            operations += processing.parse_derive_operations(derive)
+
+        if operations:
+            if graphic == "line_graphic" and error_band is not None:
+                raise InvalidOptionError("Error bands can't be drawn around derived series.")
+
+            with profiling.stage("derive"):
+                legends, data_vector = processing.derive_data_sets(legends, data_vector, operations)
+
+        if graphic == "scatter_graphic":
+            plotting.plot_scatter_graphic(data.x_axis_ticks, data.y_axis_ticks, legends, data_vector, output, labels)
+        else:
+            error_bands = processing.get_error_bands(data.statistics, error_band) if graphic == "line_graphic" and error_band is not None else None
+            plotting.plot_line_graphic(data.x_axis_ticks, data.y_axis_ticks, legends, data_vector, output, labels, graphic == "varas_door_width_9", no_marker, error_bands)
+    elif graphic == "environment_heatmap_animation":
+        if hasattr(output, "write") and image_format not in ("gif", "png", "apng"):
+            raise InvalidOptionError(f"Animations written to a file object must be gif, png or apng, not {image_format}.")
+
+        def read_frames(): # each frame is parsed again (or read from the cache) only when it is drawn
+            for frame_file in data.frame_files:
+                frame = parse_environment_heatmap(frame_file, data.wall_threshold, "2d", data.suppress_heatmap_exits, data.dtype)
+                yield frame.x_axis_ticks, frame.y_axis_ticks, frame.matrix
+
+        plotting.plot_heatmap_animation(read_frames(), (0, data.maximum_value), output, labels, frame_duration, over_value_color="white",
+                                        origin="upper", full_resolution=full_resolution, animation_format=image_format if hasattr(output, "write") else None)
+    else:
+        raise InvalidOptionError(f"Invalid graphic: {graphic}.")
+
+def render_data(graphic, data, output=None, labels=("", "", ""), image_format="png", no_marker=False, full_resolution=False,
+                frame_duration=100, error_band=None, derive=None, close_figures=True, grid_columns=None, panel_titles=None, dpi=None,
+                png_compression=None, rasterize=True):
+    """
+        Plot a graphic from the data returned by parse (or by the parse_* function of its kind).
+
+        Args:
+            graphic (str): The graphic to be generated. One of GRAPHICS.
+            data (EnvironmentHeatmapData | HeatmapData | ConfigurationData | AnimationData | GridData): The parsed data of the graphic.
+            output (str | file | None): The path of the output file, a binary file object, or None to return the encoded image.
+            labels (list): The title, x-axis label and y-axis label of the graphic.
+            image_format (str): The format of the image (png, svg, pdf, ... or gif, png and apng for animations) when OUTPUT isn't a path.
+                                Paths are encoded according to their extension.
+            no_marker (bool): Don't mark the data points of a line graphic.
+            full_resolution (bool): Draw every cell of heatmaps instead of reducing large matrices to the resolution of the figure.
+            frame_duration (int): Time, in milliseconds, each frame of an animation is displayed.
+            error_band (str | None): The error band drawn around each line of a line graphic (one of processing.ERROR_BANDS), or None.
+            derive (str | None): Operations computing the plotted series from the data sets of a configuration file, such as "difference,normalize"
+                                 (see processing.parse_derive_operations and processing.derive_data_sets), or None to plot the data sets themselves.
+            close_figures (bool): Close the pyplot figures created for the graphic once it is saved. Figures are always closed on errors.
+            grid_columns (int | None): The number of columns of a grid of panels (see parse_grid), or None to choose it from the number of panels.
+            panel_titles (list | None): The title of each panel of a grid, or None to letter them (a), (b), ...
+            dpi (float | None): The resolution of the figures, in dots per inch, or None for the default of matplotlib. In vector outputs, it is
+                                the resolution of the rasterized artists.
+            png_compression (int | None): The zlib compression level (0-9) of PNG outputs, or None for the default. Lower levels encode faster.
+            rasterize (bool): Rasterize the filled contours, images and surfaces of vector outputs (pdf, svg, eps, ps), keeping the axes and text as vectors.
+        Returns:
+            bytes | None: The encoded image if OUTPUT is None.
+        Raises:
+            PlotterError: If the graphic can't be plotted with the given data and options.
+    """
+
+    import matplotlib
+    from matplotlib import pyplot as plt
+
+    if png_compression is not None and not 0 <= png_compression <= 9:
+        raise InvalidOptionError(f"The PNG compression level must be between 0 and 9, not {png_compression}.")
+    if dpi is not None and dpi <= 0:
+        raise InvalidOptionError(f"The DPI must be positive, not {dpi}.")
+
+    import plotting
+
+    parameters = {"savefig.format": "png" if image_format in ("gif", "apng") else image_format}
+    if dpi is not None:
+        parameters.update({"figure.dpi": dpi, "savefig.dpi": dpi})
+
+    target = io.BytesIO() if output is None else output
+    figures_before = set(plt.get_fignums())
+    try:
+        with matplotlib.rc_context(parameters), plotting.encoding_options(png_compression, rasterize):
+            draw(graphic, data, target, labels, no_marker, full_resolution, frame_duration, error_band, derive, image_format, grid_columns, panel_titles)
+    except BaseException:
+        close_figures = True
+        raise
+    finally:
+        if close_figures:
+            for number in set(plt.get_fignums()) - figures_before:
+                plt.close(number)
+
+    return target.getvalue() if output is None else None
+
+def render(graphic, input_file, output=None, labels=("", "", ""), image_format="png", ignore_marked_data=False, force_over_values=False,
+           suppress_heatmap_exits=False, wall_threshold=1000.0, no_marker=False, full_resolution=False, frame_duration=100, error_band=None,
+           derive=None, close_figures=True, dtype="float64", grid_columns=None, panel_titles=None, dpi=None, png_compression=None, rasterize=True):
+    """
+        Process the input file and plot the selected graphic into OUTPUT, or return it encoded.
+
+        Args:
+            graphic (str): The graphic to be generated. One of GRAPHICS.
+            input_file (str | list): The name of the data or configuration file (or, for animations, the listing file or glob pattern of the frames).
+                                     Several data files of a graphic of GRID_GRAPHICS are parsed concurrently and drawn as the panels of a single
+                                     figure, sharing one color scale and colorbar.
+            output (str | file | None): The path of the output file, a binary file object, or None to return the encoded image.
+            labels (list): The title, x-axis label and y-axis label of the graphic.
+            image_format (str): The format of the image when OUTPUT isn't a path (see render_data).
+            ignore_marked_data (bool): Ignore data on lines beginning with #1 when calculating min/max (heatmap and contours).
+            force_over_values (bool): Force over values on lines beginning with #1 to be colored dark red (heatmap and contours).
+            suppress_heatmap_exits (bool): Suppress the exits located on the edges of an environment heatmap.
+            wall_threshold (float): Threshold from which a cell of an environment heatmap is considered a wall.
+            dtype (str): The type in which the parsed data is kept, one of DTYPES. int32 and float32 take a fraction of the memory of float64
+                         (the default), and int32 rounds the data to integers.
+            no_marker, full_resolution, frame_duration, error_band, derive, close_figures, grid_columns, panel_titles, dpi, png_compression, rasterize:
+                see render_data.
+        Returns:
+            bytes | None: The encoded image if OUTPUT is None.
+        Raises:
+            PlotterError: If an input file doesn't exist or can't be processed, or if the graphic or its options are invalid.
+    """
+
+    if graphic not in GRAPHICS:
+        raise InvalidOptionError(f"Invalid graphic: {graphic}.")
+
+    with profiling.stage("parse"):
+        data = parse(graphic, input_file, ignore_marked_data, force_over_values, suppress_heatmap_exits, wall_threshold, dtype)
+
+    return render_data(graphic, data, output, labels, image_format, no_marker, full_resolution, frame_duration, error_band, derive, close_figures, grid_columns,
+                       panel_titles, dpi, png_compression, rasterize)
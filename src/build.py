@@ -0,0 +1,334 @@
+import functools
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+import processing
+from api import CONFIGURATION_GRAPHICS
+
+BUILD_STATE_FILE = "out/.build_state.json"
+
+OUTPUT_CACHE_VERSION = 1 # must be increased whenever the same options produce a different image
+OUTPUT_CACHE_ENABLED = True
+OUTPUT_CACHE_DIRECTORY = ".cache/outputs"
+OUTPUT_CACHE_SIZE_LIMIT = 1024 * 2 ** 20 # in bytes
+OUTPUT_CACHE_HASHES = "file_hashes.json" # hashes of the input files, reused while their modification time and size don't change
+
+def get_input_dependencies(choice, input_file):
+    """
+        Determine the files a graphic depends on.
+
+        Args:
+            choice (str): The graphic to be generated.
+            input_file (str | list): The input file of the graphic, or the input files of the panels of a grid.
+        Returns:
+            list: The input file followed, for graphics generated from a configuration file, by the data files it references.
+                  For animations, the listing file (if any) followed by every frame. For a grid, the dependencies of each panel.
+    """
+
+    if isinstance(input_file, list):
+        return [path for panel_input_file in input_file for path in get_input_dependencies(choice, panel_input_file)]
+
+    if choice == "environment_heatmap_animation":
+        frame_files = processing.get_animation_frame_files(input_file)
+        return ([input_file] if os.path.isfile(input_file) else []) + frame_files
+
+    dependencies = [input_file]
+
+    if choice in CONFIGURATION_GRAPHICS:
+        try:
+            dependencies.extend(processing.get_configuration_data_files(input_file))
+        except FileNotFoundError:
+            pass  # the graphic is never up to date, and its generation reports the missing file
+
+    return dependencies
+
+def hash_file(path, file_hashes):
+    """
+        Compute the SHA-256 of a file, or of every file inside a directory (binary data stores).
+
+        The hash is only recomputed if the modification time or the size of the file changed since it was recorded in FILE_HASHES.
+
+        Args:
+            path (str): The file or directory to be hashed.
+            file_hashes (dict): Previously computed hashes, keyed by path. Updated in place.
+        Returns:
+            str: The hexadecimal digest of the file.
+
+        Raises:
+            OSError: If the file can't be read.
+    """
+
+    if os.path.isdir(path):
+        digest = hashlib.sha256()
+        for name in sorted(os.listdir(path)):
+            digest.update(name.encode())
+            digest.update(hash_file(os.path.join(path, name), file_hashes).encode())
+
+        return digest.hexdigest()
+
+    file_status = os.stat(path)
+    recorded = file_hashes.get(path)
+    if recorded is not None and recorded["mtime_ns"] == file_status.st_mtime_ns and recorded["size"] == file_status.st_size:
+        return recorded["sha256"]
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        while block := file.read(2 ** 20):
+            digest.update(block)
+
+    file_hashes[path] = {"mtime_ns": file_status.st_mtime_ns, "size": file_status.st_size, "sha256": digest.hexdigest()}
+
+    return digest.hexdigest()
+
+def get_job_signature(options, build_state):
+    """
+        Compute the signature of a graphic, made of the hashes of its inputs and of its options.
+
+        Args:
+            options (dict): The keyword arguments of generate_graphic.
+            build_state (dict): The build state, whose recorded file hashes are reused and updated.
+        Returns:
+            dict | None: The signature of the graphic, or None if some input file can't be read.
+    """
+
+    try:
+        inputs = {path: hash_file(path, build_state["files"]) for path in get_input_dependencies(options["choice"], options["input_file"])}
+    except OSError:
+        return None
+
+    return {"inputs": inputs, "options": options}
+
+def load_build_state():
+    """
+        Load the build state, which records the signature of every graphic generated in incremental mode.
+
+        Returns:
+            dict: A dict with the recorded file hashes ("files") and the signature of each output file ("outputs").
+    """
+
+    try:
+        with open(BUILD_STATE_FILE) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {"files": {}, "outputs": {}}
+
+def save_build_state(build_state):
+    """
+        Save the build state to BUILD_STATE_FILE.
+    """
+
+    os.makedirs(os.path.dirname(BUILD_STATE_FILE), exist_ok=True)
+
+    temporary_file = BUILD_STATE_FILE + ".tmp"
+    with open(temporary_file, "w") as file:
+        json.dump(build_state, file)
+
+    os.replace(temporary_file, BUILD_STATE_FILE)
+
+def is_up_to_date(options, signature, build_state):
+    """
+        Indicate if a graphic doesn't need to be generated again: its output file exists and neither its inputs nor its options changed.
+
+        Args:
+            options (dict): The keyword arguments of generate_graphic.
+            signature (dict | None): The current signature of the graphic, as returned by get_job_signature.
+            build_state (dict): The build state.
+        Returns:
+            bool: True if the graphic is up to date.
+    """
+
+    if signature is None or not os.path.isfile(f"out/{options['output_file']}"):
+        return False
+
+    return build_state["outputs"].get(options["output_file"]) == signature
+
+def configure_output_cache(enabled=None, directory=None, size_limit=None):
+    """
+        Configure the content-addressed cache of rendered outputs. Arguments left as None keep their current value.
+
+        Args:
+            enabled (bool): Indicates if rendered outputs should be reused.
+            directory (str): The directory where the rendered outputs are stored.
+            size_limit (int): The maximum size, in bytes, of the cache. The least recently used outputs are evicted first.
+        Returns:
+            None
+    """
+
+    global OUTPUT_CACHE_ENABLED, OUTPUT_CACHE_DIRECTORY, OUTPUT_CACHE_SIZE_LIMIT
+
+    if enabled is not None:
+        OUTPUT_CACHE_ENABLED = enabled
+    if directory is not None:
+        OUTPUT_CACHE_DIRECTORY = directory
+    if size_limit is not None:
+        OUTPUT_CACHE_SIZE_LIMIT = size_limit
+
+@functools.lru_cache(maxsize=None)
+def get_library_versions():
+    """
+        Return the versions of Python and of the libraries that draw and encode the graphics, which are part of the key of every rendered output.
+        The versions are read from the installed package metadata, so matplotlib isn't imported when every graphic is reused.
+    """
+
+    from importlib import metadata
+
+    return {"python": sys.version.split()[0], **{package: metadata.version(package) for package in ("matplotlib", "numpy", "pillow")}}
+
+def load_output_file_hashes():
+    """
+        Load the hashes of the input files recorded by the output cache.
+    """
+
+    try:
+        with open(os.path.join(OUTPUT_CACHE_DIRECTORY, OUTPUT_CACHE_HASHES)) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+def save_output_file_hashes(file_hashes):
+    """
+        Save the hashes of the input files recorded by the output cache, dropping the files that no longer exist.
+    """
+
+    file_hashes = {path: recorded for path, recorded in file_hashes.items() if os.path.exists(path)}
+
+    try:
+        os.makedirs(OUTPUT_CACHE_DIRECTORY, exist_ok=True)
+        with tempfile.NamedTemporaryFile("w", dir=OUTPUT_CACHE_DIRECTORY, suffix=".tmp", delete=False) as file:
+            json.dump(file_hashes, file)
+
+        os.replace(file.name, os.path.join(OUTPUT_CACHE_DIRECTORY, OUTPUT_CACHE_HASHES))
+    except OSError:
+        pass # the hashes are computed again next time
+
+def get_output_key(options, file_hashes):
+    """
+        Compute the key of the output of a graphic: a hash of the contents of its inputs (including the data files of a configuration file),
+        of the graphic type, labels and every other option, of the format of the output and of the library versions.
+        The name of the output file is not part of the key, so the same graphic saved under several names is rendered only once.
+
+        Args:
+            options (dict): The keyword arguments of generate_graphic.
+            file_hashes (dict): Previously computed hashes of the input files, keyed by path. Updated in place.
+        Returns:
+            str | None: The hexadecimal key, or None if some input file can't be read.
+    """
+
+    try:
+        inputs = [hash_file(path, file_hashes) for path in get_input_dependencies(options["choice"], options["input_file"])]
+    except OSError:
+        return None
+
+    graphic_options = {option: value for option, value in options.items() if option not in ("input_file", "output_file")}
+    extension = os.path.splitext(options["output_file"])[1].lower()
+
+    key = json.dumps([OUTPUT_CACHE_VERSION, get_library_versions(), inputs, graphic_options, extension], sort_keys=True)
+
+    return hashlib.sha256(key.encode()).hexdigest()
+
+def get_cached_output_file(key, output_file):
+    """
+        Return the path of the cached output with the given key, which keeps the extension of OUTPUT_FILE.
+    """
+
+    return os.path.join(OUTPUT_CACHE_DIRECTORY, key + os.path.splitext(output_file)[1].lower())
+
+def link_or_copy(source, destination):
+    """
+        Make DESTINATION a hard link to SOURCE, or a copy of it if hard links aren't possible (for example, across file systems).
+        DESTINATION is replaced atomically.
+    """
+
+    temporary_file = f"{destination}.{os.getpid()}.tmp"
+    try:
+        os.link(source, temporary_file)
+    except OSError:
+        shutil.copyfile(source, temporary_file)
+
+    os.replace(temporary_file, destination)
+
+def detach_output(output_path):
+    """
+        Remove an output file that is a hard link to a cached output, so rendering it again doesn't overwrite the cached output in place.
+    """
+
+    try:
+        if os.stat(output_path).st_nlink > 1:
+            os.remove(output_path)
+    except OSError:
+        pass
+
+def restore_output(key, output_path):
+    """
+        Place the cached output with the given key at OUTPUT_PATH, as a hard link or a copy.
+
+        Args:
+            key (str): The key of the output, as returned by get_output_key.
+            output_path (str): The path where the graphic would be saved.
+        Returns:
+            int | None: The size of the restored output, or None if it isn't cached.
+    """
+
+    cached_file = get_cached_output_file(key, output_path)
+
+    try:
+        size = os.stat(cached_file).st_size
+
+        if os.path.dirname(output_path):
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        if not (os.path.exists(output_path) and os.path.samefile(cached_file, output_path)):
+            link_or_copy(cached_file, output_path)
+
+        os.utime(cached_file) # marks the output as recently used
+    except OSError:
+        return None
+
+    return size
+
+def store_output(key, output_path):
+    """
+        Keep a rendered output in the cache under the given key, then evict the least recently used outputs if the cache exceeds OUTPUT_CACHE_SIZE_LIMIT.
+        Outputs that aren't regular files (animations saved as directories of frames) are not cached.
+    """
+
+    if not os.path.isfile(output_path):
+        return
+
+    try:
+        os.makedirs(OUTPUT_CACHE_DIRECTORY, exist_ok=True)
+        link_or_copy(output_path, get_cached_output_file(key, output_path))
+        evict_outputs()
+    except OSError:
+        pass # the cache is only an optimization
+
+def evict_outputs():
+    """
+        Remove the least recently used outputs until the cache fits into OUTPUT_CACHE_SIZE_LIMIT.
+    """
+
+    entries = [(entry.stat().st_mtime_ns, entry.stat().st_size, entry.path) for entry in os.scandir(OUTPUT_CACHE_DIRECTORY)
+               if entry.is_file() and entry.name != OUTPUT_CACHE_HASHES and not entry.name.endswith(".tmp")]
+    cache_size = sum(size for _, size, _ in entries)
+
+    for _, size, path in sorted(entries):
+        if cache_size <= OUTPUT_CACHE_SIZE_LIMIT:
+            break
+
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass # already removed by another process
+
+        cache_size -= size
+
+def clear_output_cache():
+    """
+        Remove every output stored in the cache.
+    """
+
+    if os.path.isdir(OUTPUT_CACHE_DIRECTORY):
+        shutil.rmtree(OUTPUT_CACHE_DIRECTORY)
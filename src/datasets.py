@@ -0,0 +1,197 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from errors import InvalidDataError, InvalidOptionError
+
+DTYPES = ("int32", "float32", "float64") # types in which the parsed data can be kept
+
+def check_dtype(dtype):
+    """
+        Check that DTYPE is one of DTYPES.
+
+        Raises:
+            InvalidOptionError: If DTYPE isn't one of DTYPES.
+    """
+
+    if dtype not in DTYPES:
+        raise InvalidOptionError(f"Invalid data type {dtype}. Available types: {', '.join(DTYPES)}.")
+
+def as_dtype(values, dtype):
+    """
+        Convert an array of values to one of DTYPES. Integer types round the values to the nearest integer instead of truncating them.
+
+        Args:
+            values (np.ndarray): The values.
+            dtype (str): One of DTYPES.
+        Returns:
+            np.ndarray: The values in the given type, or VALUES itself if it already has it.
+        Raises:
+            InvalidOptionError: If DTYPE isn't one of DTYPES.
+    """
+
+    check_dtype(dtype)
+
+    values = np.asarray(values)
+    if values.dtype == dtype:
+        return values
+
+    if np.issubdtype(np.dtype(dtype), np.integer) and not np.issubdtype(values.dtype, np.integer):
+        values = np.rint(values)
+
+    return values.astype(dtype)
+
+@dataclass(slots=True)
+class AxisTicks:
+    """
+        Locations and values of the ticks of an axis. The locations are converted to numbers once, when the ticks are parsed, and their text is kept.
+        Unpacks like the (locations, values) tuples accepted by the plotting functions.
+    """
+
+    locations: np.ndarray # float
+    values: tuple # str
+    location_text: tuple = () # str, the locations as written in the input file
+
+    @classmethod
+    def from_text(cls, locations, values):
+        """
+            Create the ticks of an axis from the lines of an input file that hold them.
+
+            Args:
+                locations (list[str]): The locations of the ticks.
+                values (list[str]): The values (labels) of the ticks.
+            Returns:
+                AxisTicks: The ticks.
+            Raises:
+                InvalidDataError: If a location isn't a number.
+        """
+
+        try:
+            return cls(np.array(locations, dtype=float), tuple(values), tuple(locations))
+        except ValueError:
+            raise InvalidDataError(f"Non-numeric tick location found in {' '.join(locations)}.")
+
+    @classmethod
+    def empty(cls):
+        return cls(np.empty(0), ())
+
+    def __iter__(self):
+        yield self.locations
+        yield self.values
+
+    def location_labels(self):
+        """Return the locations as written in the input file, or formatted from their numbers if the ticks weren't parsed from text."""
+
+        if len(self.location_text) == len(self.locations):
+            return list(self.location_text)
+
+        return [f"{location:g}" for location in self.locations]
+
+    def key(self):
+        """Return a hashable representation of the ticks, used to key figure templates."""
+        return tuple(self.locations.tolist()), self.values
+
+@dataclass(slots=True)
+class DataSets:
+    """
+        Data sets of a configuration file, stored as the rows of a single contiguous 2D array. Data sets shorter than the longest one are
+        padded with zeros, and their lengths are kept in an index. Indexing and iterating yield each data set without its padding.
+    """
+
+    values: np.ndarray # one row for each data set
+    lengths: np.ndarray # int64
+
+    @classmethod
+    def from_series(cls, series, dtype="float64"):
+        """
+            Stack data sets into a single array.
+
+            Args:
+                series (list): The data sets, as sequences of numbers.
+                dtype (str): One of DTYPES.
+            Returns:
+                DataSets: The data sets.
+            Raises:
+                InvalidOptionError: If DTYPE isn't one of DTYPES.
+        """
+
+        check_dtype(dtype)
+
+        lengths = np.fromiter((len(data_set) for data_set in series), dtype=np.int64, count=len(series))
+
+        values = np.zeros((len(series), lengths.max() if len(series) > 0 else 0), dtype=dtype)
+        for row, data_set in enumerate(series):
+            values[row, :lengths[row]] = as_dtype(data_set, dtype)
+
+        return cls(values, lengths)
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def __getitem__(self, index):
+        return self.values[index, :self.lengths[index]]
+
+    def __iter__(self):
+        for index in range(len(self.lengths)):
+            yield self[index]
+
+    def padded(self, fill=np.nan):
+        """Return the data sets as a float array, padding the data sets shorter than the longest one with FILL."""
+
+        padded = self.values.astype(float)
+        padded[np.arange(padded.shape[1]) >= self.lengths[:, np.newaxis]] = fill
+
+        return padded
+
+@dataclass(slots=True)
+class EnvironmentHeatmapData:
+    """Data of an environment heatmap file, as returned by processing.process_env_heatmap_data."""
+
+    x_axis_ticks: AxisTicks
+    y_axis_ticks: AxisTicks
+    z_axis_ticks: AxisTicks # empty for 2D graphics
+    matrix: np.ndarray
+    maximum_value: float
+
+@dataclass(slots=True)
+class HeatmapData:
+    """Square matrix of a heatmap or contour graphic, as returned by processing.process_heatmap_data."""
+
+    matrix: np.ndarray
+    min_max_values: tuple
+
+@dataclass(slots=True)
+class ConfigurationData:
+    """Data sets referenced by a configuration file, as returned by processing.process_configuration_file."""
+
+    x_axis_ticks: AxisTicks
+    y_axis_ticks: AxisTicks
+    legends: list
+    data_vector: DataSets # the mean of each line of each data set
+    statistics: list # the statistics of each data set (see processing.process_experimental_data_statistics)
+
+@dataclass(slots=True)
+class AnimationData:
+    """Environment heatmap files of an animation. The frames are only parsed while they are drawn."""
+
+    frame_files: list
+    maximum_value: float
+    wall_threshold: float
+    suppress_heatmap_exits: bool
+    dtype: str = "float64" # type of the matrices of the frames
+
+@dataclass(slots=True)
+class GridData:
+    """Data of the panels of a grid of graphics drawn into a single figure with a shared color scale."""
+
+    panels: list # EnvironmentHeatmapData or HeatmapData, in the order of the input files
+    min_max_values: tuple # the minimum and maximum values across every panel
+
+@dataclass(slots=True)
+class ContourGeometry:
+    """Contour lines and filled contours of a matrix, as returned by plotting.trace_contours."""
+
+    levels: np.ndarray # float64
+    bounds: tuple # the minimum and maximum (x, y) coordinates of the matrix
+    lines: list # (vertices, codes) of the lines of each level, or None if a level has no lines
+    fills: list # (vertices, codes) of the polygons between each pair of levels, extended below and above the levels, or None if there are none
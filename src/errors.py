@@ -0,0 +1,22 @@
+class PlotterError(Exception):
+    """Base class of the errors raised while processing the input files or plotting a graphic. Its message is meant to be shown to the user.
+
+    Attributes:
+        message (str): explanation of the error
+    """
+
+    def __init__(self, message=""):
+        self.message = message
+        super().__init__(self.message)
+
+    def __str__(self):
+        return self.message
+
+class InputNotFoundError(PlotterError, FileNotFoundError):
+    """Raised when an input file (data, configuration, manifest or animation frame) doesn't exist."""
+
+class InvalidDataError(PlotterError, ValueError):
+    """Raised when the content of an input file can't be processed: non-numeric values, lines of different lengths, missing data, etc."""
+
+class InvalidOptionError(PlotterError, ValueError):
+    """Raised when a graphic is requested with an unknown graphic type, data type or an option that doesn't suit its data."""
@@ -0,0 +1,146 @@
+import argparse
+import json
+import os
+import sys
+import numpy as np
+
+import processing
+from errors import InputNotFoundError, InvalidDataError, PlotterError
+
+def creating_arg_parser():
+
+    description = 'Converts experiment data files into binary data stores, which are read by the plotter through memory-mapped arrays.'
+    epilog = """Each data file FILE is converted into the directory FILE.store (without the .txt extension), which can be used wherever the data file was used, including inside configuration files."""
+
+    parser = argparse.ArgumentParser(description=description, epilog=epilog)
+
+    parser.add_argument('files', nargs="+", help="Experiment data files to be converted.")
+    parser.add_argument('-d', '--directory', nargs=1, help="Directory where the data stores are created. Defaults to the directory of each data file.")
+
+    return parser
+
+def parse_data_file(filename):
+    """
+        Parse the content of an experiment data file.
+
+        Args:
+            filename (str): The name of the data file.
+
+        Returns:
+            tuple: A 5-tuple containing:
+                - A list with the three header lines (command line, separator and empty line).
+                - A flat np.ndarray with every replicate, of type int32 (int64 if needed) or float32.
+                - A np.ndarray with the number of replicates of each line.
+                - A np.ndarray with the marker of each line (processing.ROW_MARKER_*).
+                - A np.ndarray with the value of the *value prefix of each line (NaN for lines without it).
+
+        Raises:
+            InputNotFoundError: If the data file doesn't exist.
+            InvalidDataError: If there are non-numeric values in the data.
+    """
+
+    tokens = []
+    counts = []
+    markers = []
+    prefixes = []
+
+    try:
+        with processing.open_input(filename) as file:
+            header = [file.readline().rstrip("\n") for _ in range(3)]
+
+            for line in file:
+                fields = line.split()
+                if not fields:
+                    continue
+
+                if fields[0] == "#1":
+                    markers.append(processing.ROW_MARKER_SINGLE_DOOR)
+                    prefixes.append(np.nan)
+                    fields = fields[1:]
+                elif fields[0].startswith("*"):
+                    markers.append(processing.ROW_MARKER_PREFIX)
+                    prefixes.append(float(fields[0][1:]))
+                    fields = fields[1:]
+                else:
+                    markers.append(processing.ROW_MARKER_NONE)
+                    prefixes.append(np.nan)
+
+                tokens.extend(fields)
+                counts.append(len(fields))
+
+        values = np.array(tokens)
+        try:
+            values = values.astype(np.int64)
+            if values.size == 0 or (values.min() >= np.iinfo(np.int32).min and values.max() <= np.iinfo(np.int32).max):
+                values = values.astype(np.int32)
+        except ValueError:
+            values = values.astype(np.float32)
+    except FileNotFoundError:
+        raise InputNotFoundError(f"File {filename} not found.")
+    except ValueError:
+        raise InvalidDataError(f"Non-numeric value found in the {filename} data.")
+
+    return header, values, np.array(counts, dtype=np.int64), np.array(markers, dtype=np.int8), np.array(prefixes, dtype=np.float32)
+
+def write_data_store(filename, directory):
+    """
+        Convert an experiment data file into a binary data store.
+
+        The store is a directory containing:
+            - replicates.npy: a 2D array with one row per line, or a flat array if the lines have different numbers of replicates.
+            - row_offsets.npy: the index where each line begins in the flat array, followed by the total number of replicates.
+            - row_markers.npy: the marker of each line (none, #1 or *value).
+            - row_prefixes.npy: the value of the *value prefix of each line (NaN for lines without it).
+            - metadata.json: the original command line and separator, the source file name and the type of the replicates.
+
+        Args:
+            filename (str): The name of the data file.
+            directory (str): The directory of the data store.
+        Returns:
+            None
+    """
+
+    header, values, counts, markers, prefixes = parse_data_file(filename)
+
+    os.makedirs(directory, exist_ok=True)
+
+    metadata_file = os.path.join(directory, processing.DATA_STORE_METADATA)
+    if os.path.exists(metadata_file):
+        os.remove(metadata_file)  # the store is only recognized again after all arrays are written
+
+    row_offsets = np.concatenate(([0], np.cumsum(counts)))
+    uniform_rows = len(counts) > 0 and np.all(counts == counts[0])
+
+    np.save(os.path.join(directory, "replicates.npy"), values.reshape(len(counts), counts[0]) if uniform_rows else values)
+    np.save(os.path.join(directory, "row_offsets.npy"), row_offsets)
+    np.save(os.path.join(directory, "row_markers.npy"), markers)
+    np.save(os.path.join(directory, "row_prefixes.npy"), prefixes)
+
+    metadata = {
+        "format_version": 1,
+        "source": os.path.basename(filename),
+        "command_line": header[0],
+        "separator": header[1],
+        "dtype": str(values.dtype),
+        "rows": len(counts),
+    }
+    with open(metadata_file, "w") as file:
+        json.dump(metadata, file, indent=4)
+
+if __name__ == "__main__":
+    command_line = creating_arg_parser().parse_args()
+
+    for data_file in command_line.files:
+        name, extension = os.path.splitext(os.path.basename(data_file))
+        if extension.lower() in processing.COMPRESSION_FORMATS:
+            name = os.path.splitext(name)[0] # name.txt.gz -> name
+        store_name = name + ".store"
+        store_directory = os.path.join(command_line.directory[0] if command_line.directory is not None else os.path.dirname(data_file), store_name)
+
+        try:
+            write_data_store(data_file, store_directory)
+        except PlotterError as error:
+            sys.stderr.write(f"{error}\n")
+            sys.exit(1)
+
+        print(f"{data_file} -> {store_directory}")
@@ -0,0 +1,88 @@
+import json
+import shlex
+
+try:
+    import tomllib
+except ModuleNotFoundError:  # Python < 3.11
+    tomllib = None
+
+from errors import InputNotFoundError, InvalidDataError, InvalidOptionError
+
+
+def job_to_arguments(job):
+    """
+        Convert a manifest job into a list of command line arguments understood by run.py.
+
+        Args:
+            job (list | dict): Either a list of command line arguments or a dictionary mapping option names to values.
+                               Single letter keys become short options (-i) and the remaining keys become long options (--xlabel).
+                               Underscores in long option names are replaced by hyphens.
+                               Boolean values represent flags: True includes the flag and False omits it.
+                               Lists hold the values of options that receive several (such as the inputs of a grid).
+        Returns:
+            list: A list of strings with the command line arguments of the job.
+    """
+
+    if isinstance(job, list):
+        return [str(argument) for argument in job]
+
+    arguments = []
+    for key, value in job.items():
+        option = f"-{key}" if len(key) == 1 else f"--{key.replace('_', '-')}"
+
+        if isinstance(value, bool):
+            if value:
+                arguments.append(option)
+        elif isinstance(value, list):
+            arguments.extend([option, *map(str, value)])
+        else:
+            arguments.extend([option, str(value)])
+
+    return arguments
+
+
+def read_manifest(filename):
+    """
+        Read the jobs described in a manifest file.
+
+        Args:
+            filename (str): The name of the manifest file. The format is chosen by its extension:
+                            - .json: a list of jobs, each one a list of arguments or an object of options.
+                            - .toml: one [[job]] table per job, each one mapping options to values.
+                            - any other: a plain text file where each line holds the arguments of a job, as typed in the command line.
+                              Empty lines and lines beginning with '#' are ignored.
+        Returns:
+            list[list[str]]: A list with the command line arguments of each job.
+        Raises:
+            InputNotFoundError: If the manifest file doesn't exist.
+            InvalidDataError: If the manifest can't be decoded.
+            InvalidOptionError: If a TOML manifest is read with Python < 3.11.
+    """
+
+    try:
+        if filename.endswith(".json"):
+            with open(filename) as file:
+                jobs = json.load(file)
+        elif filename.endswith(".toml"):
+            if tomllib is None:
+                raise InvalidOptionError("TOML manifests require Python 3.11 or newer.")
+
+            with open(filename, "rb") as file:
+                jobs = tomllib.load(file).get("job", [])
+        else:
+            with open(filename) as file:
+                jobs = []
+                for line in file:
+                    line = line.strip()
+                    if line == "" or line.startswith("#"):
+                        continue
+
+                    jobs.append(shlex.split(line))
+    except FileNotFoundError:
+        raise InputNotFoundError(f"File {filename} not found.")
+    except InvalidOptionError:
+        raise
+    except ValueError as error:  # also covers JSON and TOML decoding errors
+        raise InvalidDataError(f"Invalid manifest {filename}: {error}")
+
+    return [job_to_arguments(job) for job in jobs]
@@ -1,16 +1,43 @@
 import matplotlib.pyplot as plt
 import matplotlib.colors as mcolors
-from mpl_toolkits.mplot3d import Axes3D
-from matplotlib import cm
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import QuadMesh
+from matplotlib.contour import ContourSet
+from matplotlib.figure import Figure
+from matplotlib.image import AxesImage
+from matplotlib.path import Path
 import numpy as np
 
-import sys
+import contextlib
+import functools
+import hashlib
+import os
+from collections import OrderedDict
+
+import processing
+import profiling
+from datasets import AxisTicks, ContourGeometry
+from errors import InvalidDataError, InvalidOptionError
 
 COLORS = ["darkblue","blue","royalblue","cyan","limegreen","yellow","darkorange","red","darkred"]
+SURFACE_CELL_PIXELS = 4 # approximate size, in pixels, of the smallest cell drawn by a 3D surface
+MAX_FIGURE_TEMPLATES = 8 # number of figure templates kept alive, the least recently used ones are released first
+MAX_CONTOUR_GEOMETRIES = 32 # number of traced contour geometries kept in memory, the least recently used ones are released first
+GRID_MAX_COLUMNS = 3 # number of columns of a grid of panels, unless given
+GRID_PANEL_SIZE = (4.8, 4.0) # size, in inches, taken by each panel of a grid
+
+VECTOR_FORMATS = ("pdf", "svg", "svgz", "eps", "ps") # formats where heavy artists are rasterized (see rasterize_heavy_artists)
 
+TEMPLATES_ENABLED = False
+PNG_COMPRESSION = None # zlib compression level (0-9) of PNG outputs, None for the default of Pillow
+RASTERIZE_HEAVY_ARTISTS = True
+figure_templates = OrderedDict() # (graphic, shape, options, ticks) -> (figure, axes, image)
+contour_geometries = OrderedDict() # (matrix hash, levels, algorithm) -> ContourGeometry
+
+@functools.lru_cache(maxsize=None)
 def set_colormap(under_color="black", over_color="darkred"):
     """
-        Create and configure the colors of a heatmap.
+        Create and configure the colors of a heatmap. The colormaps are cached, so they must not be modified.
 
         Args:
             under_color (str): The name of the color to be set for undervalues. Defaults to black.
@@ -52,7 +79,7 @@ def set_tick_information(ax, axis_tick_info, axis: str):
 
     Args:
         ax: matplolib Axes object
-        axis_tick_info (tuple): A tuple containing two elements:
+        axis_tick_info (AxisTicks | tuple): The ticks of the axis (see datasets.AxisTicks), or a tuple containing two elements:
                                   - The location of the axis ticks.
                                   - The values of the axis ticks.
         axis (str): A string indicating the axis to be configured. Can be either x, y or z.
@@ -66,7 +93,7 @@ def set_tick_information(ax, axis_tick_info, axis: str):
     if not axis_tick_info or len(tick_locations) == 0:
         return
 
-    tick_locations = list(map(float, tick_locations))
+    tick_locations = np.asarray(tick_locations, dtype=float) # already numeric for AxisTicks, so no conversion is made
 
     if axis == "x":
         if tick_values:
@@ -85,6 +112,281 @@ def set_tick_information(ax, axis_tick_info, axis: str):
             ax.set_zticks(tick_locations)
 
 
+@contextlib.contextmanager
+def encoding_options(png_compression=None, rasterize=True):
+    """
+        Context manager that sets how the figures saved inside it are encoded.
+
+        Args:
+            png_compression (int | None): The zlib compression level (0-9) of PNG outputs. Lower levels encode faster into larger files.
+                                          None keeps the default of Pillow.
+            rasterize (bool): Indicates if the heavy artists of vector outputs should be rasterized (see rasterize_heavy_artists).
+    """
+
+    global PNG_COMPRESSION, RASTERIZE_HEAVY_ARTISTS
+
+    previous_options = (PNG_COMPRESSION, RASTERIZE_HEAVY_ARTISTS)
+    PNG_COMPRESSION, RASTERIZE_HEAVY_ARTISTS = png_compression, rasterize
+    try:
+        yield
+    finally:
+        PNG_COMPRESSION, RASTERIZE_HEAVY_ARTISTS = previous_options
+
+
+def get_output_format(fig, output_file):
+    """
+        Determine the format in which a figure is saved: the extension of OUTPUT_FILE or, for file objects and names without extension, savefig.format.
+
+        Raises:
+            InvalidOptionError: If matplotlib can't save figures in that format.
+    """
+
+    extension = os.path.splitext(output_file)[1][1:].lower() if isinstance(output_file, (str, os.PathLike)) else ""
+    image_format = extension or plt.rcParams["savefig.format"]
+
+    supported_formats = fig.canvas.get_supported_filetypes()
+    if image_format not in supported_formats:
+        raise InvalidOptionError(f"Unsupported output format {image_format}. Supported formats: {', '.join(sorted(supported_formats))}.")
+
+    return image_format
+
+
+def get_output_size(output_file, start=0):
+    """
+        Return the number of bytes written to OUTPUT_FILE (a path, a directory of frames or a file object, from position START), or None if unknown.
+    """
+
+    try:
+        if hasattr(output_file, "write"):
+            return output_file.tell() - start
+        if os.path.isdir(output_file):
+            return sum(entry.stat().st_size for entry in os.scandir(output_file) if entry.is_file())
+
+        return os.path.getsize(output_file)
+    except (OSError, ValueError):
+        return None
+
+
+def rasterize_heavy_artists(fig):
+    """
+        Rasterize the artists of a figure that are expensive to write and to open as vectors (filled contours, images, meshes and 3D surfaces),
+        keeping the axes, lines and text as vectors.
+
+        Returns:
+            list: The artists that were rasterized by this call, which must be restored with set_rasterized(False) once the figure is saved,
+                  since the artists of figure templates are reused by later graphics.
+    """
+
+    from mpl_toolkits.mplot3d.art3d import Poly3DCollection
+
+    rasterized = []
+    for ax in fig.axes:
+        for artist in ax.get_children():
+            if ((isinstance(artist, ContourSet) and artist.filled) or isinstance(artist, (AxesImage, QuadMesh, Poly3DCollection))) and not artist.get_rasterized():
+                artist.set_rasterized(True)
+                rasterized.append(artist)
+
+    return rasterized
+
+
+def save_figure(fig, output_file):
+    """
+        Save a figure into OUTPUT_FILE (a path or a file object), in the format of its extension, with the options of encoding_options.
+        Heavy artists are rasterized in vector formats, and PNG outputs are compressed with PNG_COMPRESSION.
+        The encoding time and the size of the output are recorded as the savefig stage.
+
+        Raises:
+            InvalidOptionError: If matplotlib can't save figures in the format of OUTPUT_FILE.
+    """
+
+    image_format = get_output_format(fig, output_file)
+
+    options = {}
+    rasterized = rasterize_heavy_artists(fig) if image_format in VECTOR_FORMATS and RASTERIZE_HEAVY_ARTISTS else []
+    if image_format == "png" and PNG_COMPRESSION is not None:
+        options["pil_kwargs"] = {"compress_level": PNG_COMPRESSION}
+
+    try:
+        with profiling.stage("savefig") as details:
+            start = output_file.tell() if hasattr(output_file, "write") else 0
+            fig.savefig(output_file, **options)
+            details["output_bytes"] = get_output_size(output_file, start)
+    finally:
+        for artist in rasterized:
+            artist.set_rasterized(False)
+
+
+def get_target_shape(fig, cell_pixels=1, grid_shape=(1, 1)):
+    """
+        Determine how many cells of a matrix can actually be distinguished in the axes of a figure, given its size and DPI.
+
+        Args:
+            fig: matplotlib Figure object.
+            cell_pixels (int): The minimum size, in pixels, of each cell.
+            grid_shape (tuple): The number of rows and columns of panels sharing the figure. Defaults to a single panel.
+        Returns:
+            tuple: The number of lines and columns that fit into the axes area of each panel.
+    """
+
+    width, height = fig.get_size_inches() * fig.dpi
+    parameters = fig.subplotpars
+    rows, columns = grid_shape
+
+    return (max(1, int(height * (parameters.top - parameters.bottom)) // (cell_pixels * rows)),
+            max(1, int(width * (parameters.right - parameters.left)) // (cell_pixels * columns)))
+
+
+def reduce_matrix(data_matrix, factors, min_max_values):
+    """
+        Reduce a matrix by aggregating blocks of cells.
+
+        Blocks containing over values (above the maximum, such as walls and obstacles) are reduced to their maximum, and blocks containing
+        under values (below the minimum) to their minimum, so thin walls don't disappear. The remaining blocks are reduced to their mean.
+
+        Args:
+            data_matrix (np.ndarray): A 2D numpy array.
+            factors (tuple): The number of lines and columns of each block.
+            min_max_values (tuple): indicates the minimum and maximum values, respectively.
+        Returns:
+            np.ndarray: The reduced matrix. Incomplete blocks at the end of each axis are aggregated from the cells they contain.
+    """
+
+    row_factor, column_factor = factors
+    lines, columns = data_matrix.shape
+    reduced_lines = -(-lines // row_factor)
+    reduced_columns = -(-columns // column_factor)
+
+    padded = np.full((reduced_lines * row_factor, reduced_columns * column_factor), np.nan)
+    padded[:lines, :columns] = data_matrix
+    blocks = padded.reshape(reduced_lines, row_factor, reduced_columns, column_factor)
+
+    (min_value, max_value) = min_max_values
+    maxima = np.nanmax(blocks, axis=(1, 3))
+    minima = np.nanmin(blocks, axis=(1, 3))
+    means = np.nanmean(blocks, axis=(1, 3))
+
+    return np.where(maxima > max_value, maxima, np.where(minima < min_value, minima, means))
+
+
+def prepare_heatmap_matrix(fig, data_matrix, min_max_values, origin, full_resolution, grid_shape=(1, 1)):
+    """
+        Reduce the matrix of a heatmap to the resolution of its figure, unless FULL_RESOLUTION is set.
+
+        Args:
+            fig: matplotlib Figure object.
+            data_matrix (np.ndarray): A 2D numpy array representing the data.
+            min_max_values (tuple): indicates the minimum and maximum values, respectively.
+            origin (str): Indicates where the [0,0] coordinates should be placed (lower, upper).
+            full_resolution (bool): Indicates if every cell should be drawn.
+            grid_shape (tuple): The number of rows and columns of panels sharing the figure. Defaults to a single panel.
+        Returns:
+            tuple: The matrix to be drawn and the extent of the image (None if the matrix wasn't reduced).
+    """
+
+    if full_resolution:
+        return data_matrix, None
+
+    target_lines, target_columns = get_target_shape(fig, grid_shape=grid_shape)
+    factors = (max(1, data_matrix.shape[0] // target_lines), max(1, data_matrix.shape[1] // target_columns))
+    if factors == (1, 1):
+        return data_matrix, None
+
+    reduced_matrix = reduce_matrix(data_matrix, factors, min_max_values)
+    lines, columns = reduced_matrix.shape[0] * factors[0], reduced_matrix.shape[1] * factors[1]
+    extent = (-0.5, columns - 0.5, lines - 0.5, -0.5) if origin == "upper" else (-0.5, columns - 0.5, -0.5, lines - 0.5) # keeps the coordinates of the original cells, so the ticks are still valid
+
+    return reduced_matrix, extent
+
+
+def use_templates(enabled):
+    """
+        Enable or disable figure templates. While enabled, heatmaps of the same shape, options and ticks reuse the same figure, axes and
+        colorbar, only swapping the data and the limits of the image. Template figures aren't managed by pyplot, so they are never shown.
+
+        Args:
+            enabled (bool): Indicates if the next heatmaps should be drawn into figure templates.
+        Returns:
+            None
+    """
+
+    global TEMPLATES_ENABLED
+
+    TEMPLATES_ENABLED = enabled
+
+
+def release_templates():
+    """
+        Release every figure template.
+    """
+
+    while figure_templates:
+        figure, _, _ = figure_templates.popitem()[1]
+        figure.clear()
+
+
+def get_ticks_key(axis_ticks):
+    """
+        Return a hashable representation of the ticks of an axis, given as an AxisTicks or as a tuple of locations and values.
+    """
+
+    if isinstance(axis_ticks, AxisTicks):
+        return axis_ticks.key()
+
+    tick_locations, tick_values = axis_ticks
+
+    return tuple(map(float, tick_locations)), tuple(tick_values)
+
+
+def update_heatmap_template(x_axis_ticks, y_axis_ticks, data_matrix, min_max_values, over_value_color, origin, full_resolution):
+    """
+        Draw a heatmap into its figure template, which is built the first time a heatmap with the same shape, options and ticks is drawn.
+
+        Args:
+            x_axis_ticks (tuple): The locations and values of the x-axis ticks.
+            y_axis_ticks (tuple): The locations and values of the y-axis ticks.
+            data_matrix (np.ndarray): A 2D numpy array representing the data.
+            min_max_values (tuple): indicates the minimum and maximum values, respectively.
+            over_value_color (str): The color to be used for coloring over values.
+            origin (str): Indicates where the [0,0] coordinates should be placed (lower, upper).
+            full_resolution (bool): Indicates if every cell should be drawn.
+        Returns:
+            Figure: The figure of the template, with the data and limits of the image updated. Its labels are left to the caller.
+    """
+
+    key = ("heatmap", data_matrix.shape, over_value_color, origin, full_resolution, get_ticks_key(x_axis_ticks), get_ticks_key(y_axis_ticks),
+           plt.rcParams["figure.dpi"])
+    (min_value, max_value) = min_max_values
+
+    template = figure_templates.get(key)
+    if template is not None:
+        figure_templates.move_to_end(key)
+        fig, ax, image = template
+
+        data_matrix, _ = prepare_heatmap_matrix(fig, data_matrix, min_max_values, origin, full_resolution)
+        image.set_data(data_matrix)
+        image.set_clim(min_value, max_value) # also updates the colorbar
+
+        return fig
+
+    fig = Figure()
+    FigureCanvasAgg(fig) # lets the figure be drawn directly into a pixel buffer
+    ax = fig.add_subplot()
+
+    data_matrix, extent = prepare_heatmap_matrix(fig, data_matrix, min_max_values, origin, full_resolution)
+    image = ax.imshow(data_matrix, vmin=min_value, vmax=max_value, cmap=set_colormap(over_color=over_value_color), origin=origin, extent=extent)
+
+    set_tick_information(ax, x_axis_ticks, "x")
+    set_tick_information(ax, y_axis_ticks, "y")
+
+    fig.colorbar(image, ax=ax)
+
+    figure_templates[key] = (fig, ax, image)
+    if len(figure_templates) > MAX_FIGURE_TEMPLATES:
+        figure_templates.popitem(last=False)[1][0].clear()
+
+    return fig
+
+
 def get_levels(min_max_values, data_type):
     """
         Determine the levels for the contour graphic.
@@ -105,8 +407,7 @@ def get_levels(min_max_values, data_type):
     elif data_type == "float":
         levels = np.linspace(min_value, max_value, 9, endpoint=False, dtype=float)
     else:
-        sys.stderr.write(f"Unknow data type on get_levels.\n")
-        exit()
+        raise InvalidOptionError(f"Unknow data type on get_levels.")
 
     return levels
 
@@ -128,7 +429,7 @@ def get_scaling_law():
     return  exit_width, scaling_law
 
 
-def plot_heatmap(x_axis_ticks, y_axis_ticks, data_matrix, min_max_values, output_file, labels, over_value_color="darkred", origin="lower"):
+def plot_heatmap(x_axis_ticks, y_axis_ticks, data_matrix, min_max_values, output_file, labels, over_value_color="darkred", origin="lower", full_resolution=False):
     """
         Generate a heatmap based on the parameters' data.
 
@@ -141,33 +442,112 @@ def plot_heatmap(x_axis_ticks, y_axis_ticks, data_matrix, min_max_values, output
                                   - The values of the y-axis ticks.
             data_matrix (np.ndarray): A 2D numpy array representing the data.
             min_max_values (tuple): indicates the minimum and maximum values, respectively.
-            output_file (str): The name of the file where the generated image will be saved.
+            output_file (str | file): The path of the file, or the file object, where the generated image will be saved.
             labels (list): A list of labels to be included in the graphic. Should contain:
                        - labels[0]: The title of the graph.
                        - labels[1]: The label for the x-axis.
                        - labels[2]: The label for the y-axis.
             over_value_color (str): The color to be used for coloring over values. Defaults to darkred.
             origin (str): Indicates where the [0,0] coordinates should be placed (lower, upper). Defaults to "lower".
+            full_resolution (bool): If false, matrices larger than the pixels available in the figure are reduced (see reduce_matrix) before being drawn. Defaults to False.
         Returns:
             None
     """
 
-    fig = plt.figure()
+    with profiling.stage("artists"):
+        if TEMPLATES_ENABLED:
+            fig = update_heatmap_template(x_axis_ticks, y_axis_ticks, data_matrix, min_max_values, over_value_color, origin, full_resolution)
+            ax = fig.axes[0]
+            ax.set_title(labels[0])
+            ax.set_xlabel(labels[1])
+            ax.set_ylabel(labels[2])
+        else:
+            fig = plt.figure()
 
-    (min_value, max_value) = min_max_values
-    plt.imshow(data_matrix, vmin=min_value, vmax=max_value, cmap=set_colormap(over_color=over_value_color), origin=origin)
+            data_matrix, extent = prepare_heatmap_matrix(fig, data_matrix, min_max_values, origin, full_resolution)
+
+            (min_value, max_value) = min_max_values
+            plt.imshow(data_matrix, vmin=min_value, vmax=max_value, cmap=set_colormap(over_color=over_value_color), origin=origin, extent=extent)
+
+            set_tick_information(plt.gca(), x_axis_ticks, "x")
+            set_tick_information(plt.gca(), y_axis_ticks, "y")
+
+            plt.colorbar()
+
+            set_labels(labels)
+
+    save_figure(fig, output_file)
+
+
+def plot_heatmap_animation(frames, min_max_values, output_file, labels, duration, over_value_color="darkred", origin="lower", full_resolution=False, animation_format=None):
+    """
+        Generate an animation of heatmaps, drawing every frame into the same figure. Numbered frames are written before the next one
+        is drawn, while animated GIF and PNG files are written once every frame is drawn.
+
+        Args:
+            frames (iterator): The frames, as 3-tuples with the x-axis ticks, the y-axis ticks and the data matrix (see plot_heatmap). Consumed lazily.
+            min_max_values (tuple): indicates the minimum and maximum values, respectively. The same color scale is used by every frame.
+            output_file (str | file): The name of the animation (.gif, .png or .apng), or of the directory where numbered frames are saved.
+                                      A binary file object can also be given along with ANIMATION_FORMAT.
+            labels (list): A list of labels to be included in the graphic. Should contain:
+                       - labels[0]: The title of the graph.
+                       - labels[1]: The label for the x-axis.
+                       - labels[2]: The label for the y-axis.
+            duration (int): The time each frame is displayed, in milliseconds.
+            over_value_color (str): The color to be used for coloring over values. Defaults to darkred.
+            origin (str): Indicates where the [0,0] coordinates should be placed (lower, upper). Defaults to "lower".
+            full_resolution (bool): If false, matrices larger than the pixels available in the figure are reduced (see reduce_matrix). Defaults to False.
+            animation_format (str | None): The format of the animation (gif, png or apng). If None, it is chosen by the extension of OUTPUT_FILE.
+        Returns:
+            None
+    """
+
+    import animation
 
-    set_tick_information(plt.gca(), x_axis_ticks, "x")
-    set_tick_information(plt.gca(), y_axis_ticks, "y")
+    def set_frame_artists_animated(ax, animated):
+        for artist in [ax.images[0], *ax.spines.values()]: # the spines are drawn over the image
+            artist.set_animated(animated)
 
-    plt.colorbar()
+    def draw_frames():
+        # The color scale is fixed, so only the image changes between frames: everything else is drawn once into a background,
+        # onto which the image and the spines over it are drawn for each frame.
+        background_figure = None
+        try:
+            for x_axis_ticks, y_axis_ticks, data_matrix in frames:
+                fig = update_heatmap_template(x_axis_ticks, y_axis_ticks, data_matrix, min_max_values, over_value_color, origin, full_resolution)
+                ax = fig.axes[0]
+                image = ax.images[0]
 
-    set_labels(labels)
+                if fig is not background_figure: # the first frame, or a frame with other ticks
+                    if background_figure is not None:
+                        set_frame_artists_animated(background_figure.axes[0], False)
 
-    fig.savefig(f"out/{output_file}")
+                    ax.set_title(labels[0])
+                    ax.set_xlabel(labels[1])
+                    ax.set_ylabel(labels[2])
 
+                    set_frame_artists_animated(ax, True)
+                    fig.canvas.draw()
+                    background = fig.canvas.copy_from_bbox(fig.bbox)
+                    background_figure = fig
 
-def plot_3d_heatmap(x_axis_ticks, y_axis_ticks, z_axis_ticks, data_matrix, min_max_values, output_file, labels, over_value_color="darkred"):
+                fig.canvas.restore_region(background)
+                ax.draw_artist(image)
+                for spine in ax.spines.values():
+                    ax.draw_artist(spine)
+
+                yield animation.canvas_to_image(fig.canvas)
+        finally:
+            if background_figure is not None:
+                set_frame_artists_animated(background_figure.axes[0], False) # the template may be saved by a later heatmap
+
+    with profiling.stage("savefig") as details: # each frame is parsed and drawn while the animation is saved
+        start = output_file.tell() if hasattr(output_file, "write") else 0
+        animation.write_animation(output_file, draw_frames(), duration, animation_format)
+        details["output_bytes"] = get_output_size(output_file, start)
+
+
+def plot_3d_heatmap(x_axis_ticks, y_axis_ticks, z_axis_ticks, data_matrix, min_max_values, output_file, labels, over_value_color="darkred", full_resolution=False):
     """
             Generate a 3D heatmap based on the parameters' data.
 
@@ -183,41 +563,150 @@ def plot_3d_heatmap(x_axis_ticks, y_axis_ticks, z_axis_ticks, data_matrix, min_m
                                   - The values of the z-axis ticks.
                 data_matrix (np.ndarray): A 2D numpy array representing the data.
                 min_max_values (tuple): indicates the minimum and maximum values, respectively.
-                output_file (str): The name of the file where the generated image will be saved.
+                output_file (str | file): The path of the file, or the file object, where the generated image will be saved.
                 labels (list): A list of labels to be included in the graphic. Should contain:
                            - labels[0]: The title of the graph.
                            - labels[1]: The label for the x-axis.
                            - labels[2]: The label for the y-axis.
                 over_value_color (str): The color to be used for coloring over values. Defaults to darkred.
+                full_resolution (bool): If false, the surface has at most one cell per SURFACE_CELL_PIXELS pixels of the figure, and larger
+                                        matrices are reduced (see reduce_matrix). If true, every cell is drawn. Defaults to False.
             Returns:
                 None
         """
 
-    fig =  plt.figure()
-    ax: Axes3D = fig.add_subplot(projection='3d')
+    from mpl_toolkits.mplot3d import Axes3D  # only needed by 3D graphics, so it isn't imported with the module
+
+    with profiling.stage("artists"):
+        fig =  plt.figure()
+        ax: Axes3D = fig.add_subplot(projection='3d')
+
+        set_tick_information(ax, y_axis_ticks, "x")
+        set_tick_information(ax, x_axis_ticks, "y") # The inversion was necessary to maintain compatibility with the 2D graphic
+        set_tick_information(ax, z_axis_ticks, "z")
+
+        nLines, nColumns = data_matrix.shape
+
+        xRange = np.arange(0, nColumns, dtype=float)
+        yRange = np.arange(0, nLines, dtype=float)
+
+        if not full_resolution:
+            target_lines, target_columns = get_target_shape(fig, SURFACE_CELL_PIXELS)
+            factors = (-(-nLines // target_lines), -(-nColumns // target_columns))
+            if factors != (1, 1):
+                data_matrix = reduce_matrix(data_matrix, factors, (-np.inf, min_max_values[1]))
+                nLines, nColumns = data_matrix.shape
+                yRange = yRange[::factors[0]] + (factors[0] - 1) / 2 # center of each block
+                xRange = xRange[::factors[1]] + (factors[1] - 1) / 2
+
+        yCoordinates, xCoordinates = np.meshgrid(yRange, xRange, indexing="ij")
+
+        (min_value, max_value) = min_max_values
+        surf = ax.plot_surface(yCoordinates, xCoordinates, data_matrix, vmax=max_value, cmap=set_colormap(over_color=over_value_color),
+                               rcount=nLines, ccount=nColumns, linewidth=0, antialiased=False)
+        ax.set_zlim(0, max_value)
+        ax.set_box_aspect([1,1,0.4])
+        ax.view_init(elev=40)
+
+        fig.colorbar(surf, ax=ax, aspect=12, shrink=0.7, pad=0.1)
+        set_labels(labels)
+
+    save_figure(fig, output_file)
+
+
+def trace_contours(data_matrix, levels):
+    """
+        Trace the contour lines and the filled contours of a matrix, calling lines and filled on a single contour generator. Filled contours are
+        extended below the first level and above the last one. The geometry is cached in memory and in the on-disk cache of the processing module, keyed by the
+        contents of the matrix and the levels, so drawing the same matrix again (e.g. with other labels) doesn't trace it again.
+
+        Args:
+            data_matrix (np.ndarray): A 2D numpy array representing the data. NaN and infinite values are masked.
+            levels (np.ndarray): The levels of the contours (see get_levels).
+        Returns:
+            ContourGeometry: The contours, drawn with draw_contours.
+        Raises:
+            ValueError: If the levels aren't increasing.
+    """
+
+    import contourpy
+
+    levels = np.asarray(levels, np.float64)
+    if len(levels) > 1 and np.min(np.diff(levels)) <= 0.0:
+        raise ValueError("Contour levels must be increasing")
+
+    algorithm = plt.rcParams["contour.algorithm"]
+    corner_mask = plt.rcParams["contour.corner_mask"] and algorithm != "mpl2005" # mpl2005 doesn't support corner masks
+
+    data_matrix = np.ascontiguousarray(data_matrix)
+    matrix_hash = hashlib.sha256(data_matrix.view(np.uint8)).hexdigest()
+    key = (matrix_hash, data_matrix.shape, data_matrix.dtype.str, tuple(levels.tolist()), algorithm, corner_mask)
+    disk_key = repr((processing.CACHE_VERSION, "trace_contours", key))
+
+    geometry = contour_geometries.get(key)
+    if geometry is None and processing.CACHE_ENABLED:
+        geometry = processing.load_cached_result(disk_key)
+
+    if geometry is None:
+        z = np.ma.masked_invalid(data_matrix, copy=False)
+        rows, columns = z.shape
+        x, y = np.meshgrid(np.arange(columns) + 0.5, np.arange(rows) + 0.5) # cell centers, as drawn by imshow with origin="lower"
+
+        generator = contourpy.contour_generator(x, y, z, name=algorithm, corner_mask=corner_mask, line_type=contourpy.LineType.SeparateCode,
+                                                fill_type=contourpy.FillType.OuterCode)
+
+        bounds = np.concatenate(([-np.inf], levels, [np.inf])) # filled contours are extended below the first level and above the last one
+        fills = [generator.filled(lower, upper) for lower, upper in zip(bounds[:-1], bounds[1:])]
+        lines = [generator.lines(level) for level in levels]
+
+        def join(vertices, codes):
+            return (np.concatenate(vertices), np.concatenate(codes)) if len(vertices) else None
 
-    set_tick_information(ax, y_axis_ticks, "x")
-    set_tick_information(ax, x_axis_ticks, "y") # The inversion was necessary to maintain compatibility with the 2D graphic
-    set_tick_information(ax, z_axis_ticks, "z")
+        geometry = ContourGeometry(levels, ((x.min(), y.min()), (x.max(), y.max())), [join(*line) for line in lines], [join(*fill) for fill in fills])
 
-    nLines, nColumns = data_matrix.shape
+        if processing.CACHE_ENABLED:
+            processing.store_cached_result(disk_key, geometry)
 
-    xRange = np.arange(0, nColumns)
-    yRange = np.arange(0, nLines)
+    contour_geometries[key] = geometry
+    contour_geometries.move_to_end(key)
+    if len(contour_geometries) > MAX_CONTOUR_GEOMETRIES:
+        contour_geometries.popitem(last=False)
 
-    yCoordinates, xCoordinates = np.meshgrid(yRange, xRange, indexing="ij")
+    return geometry
+
+
+def draw_contours(ax, data_matrix, min_max_values, levels):
+    """
+        Draw the contour lines and the filled contours of a matrix into AX, looking like Axes.contour and Axes.contourf with extend="both".
+        Both are drawn from the same traced geometry (see trace_contours).
+
+        Returns:
+            ContourSet: The filled contours, from which the colorbar is made.
+    """
 
     (min_value, max_value) = min_max_values
-    surf = ax.plot_surface(yCoordinates, xCoordinates, data_matrix, vmax=max_value, cmap=set_colormap(over_color=over_value_color),
-                           rcount=100, ccount=100, linewidth=0, antialiased=False)
-    ax.set_zlim(0, max_value)
-    ax.set_box_aspect([1,1,0.4])
-    ax.view_init(elev=40)
 
-    fig.colorbar(surf, ax=ax, aspect=12, shrink=0.7, pad=0.1)
-    set_labels(labels)
+    geometry = trace_contours(data_matrix, levels)
+
+    # ContourSet only takes the paths between the levels, so it's given the outline of the matrix, which sets the data limits and sticky edges
+    # like Axes.contour, and the traced paths, including those of the extended bands, are set afterwards
+    (x_min, y_min), (x_max, y_max) = geometry.bounds
+    outline = np.array([[x_min, y_min], [x_max, y_min], [x_max, y_max], [x_min, y_max], [x_min, y_min]])
+
+    def paths(contours):
+        return [Path(*contour) if contour is not None else Path(np.empty((0, 2))) for contour in contours]
 
-    fig.savefig(f"out/{output_file}")
+    def placeholder(count):
+        return [[outline]] + [[] for _ in range(count - 1)]
+
+    contour_lines = ContourSet(ax, geometry.levels, placeholder(len(geometry.levels)), vmin=min_value, vmax=max_value, colors="black", extend="both", linewidths=0.5)
+    contour_lines.set_paths(paths(geometry.lines))
+
+    filled_contours = ContourSet(ax, geometry.levels, placeholder(len(geometry.levels) - 1), filled=True, vmin=min_value, vmax=max_value, cmap=set_colormap(),
+                                 extend="both", antialiased=True)
+    filled_contours.set_paths(paths(geometry.fills))
+
+    return filled_contours
 
 
 def plot_contours_graphic(data_matrix, min_max_values, output_file, labels, data_type):
@@ -227,7 +716,7 @@ def plot_contours_graphic(data_matrix, min_max_values, output_file, labels, data
         Args:
             data_matrix (np.ndarray): A 2D numpy array representing the data.
             min_max_values (tuple): indicates the minimum and maximum values, respectively.
-            output_file (str): The name of the file where the generated image will be saved.
+            output_file (str | file): The path of the file, or the file object, where the generated image will be saved.
             labels (list): A list of labels to be included in the graphic. Should contain:
                        - labels[0]: The title of the graph.
                        - labels[1]: The label for the x-axis.
@@ -238,22 +727,118 @@ def plot_contours_graphic(data_matrix, min_max_values, output_file, labels, data
             None
     """
 
-    fig = plt.figure()
+    with profiling.stage("artists"):
+        fig = plt.figure()
 
-    (min_value, max_value) = min_max_values
-    levels = get_levels(min_max_values, data_type)
+        filled_contours = draw_contours(plt.gca(), data_matrix, min_max_values, get_levels(min_max_values, data_type))
 
-    plt.contour(data_matrix, vmin=min_value, vmax=max_value, levels=levels, colors="black", origin="lower", extend="both", linewidths=0.5)  # generate contour lines
-    plt.contourf(data_matrix, vmin=min_value, vmax=max_value, levels=levels, cmap=set_colormap(), origin="lower", extend="both", antialiased=True)  # generate filled contour
+        plt.colorbar(filled_contours)  # add the colorbar
 
-    plt.colorbar()  # add the colorbar
+        set_labels(labels)
 
-    set_labels(labels)
+    save_figure(fig, output_file)
 
-    fig.savefig(f"out/{output_file}")
 
+def create_grid_figure(panel_count, labels, panel_titles, columns=None):
+    """
+        Create a figure with one axes for each panel of a grid. The title and axis labels of the graphic are shared by every panel.
 
-def plot_line_graphic(x_axis_ticks, y_axis_ticks, legends, data_vector, output_file, labels, scaling_law, no_marker):
+        Args:
+            panel_count (int): The number of panels.
+            labels (list): The title, x-axis label and y-axis label of the graphic.
+            panel_titles (list): The title of each panel.
+            columns (int | None): The number of columns of the grid, or None for up to GRID_MAX_COLUMNS.
+        Returns:
+            tuple: The figure, the axes of each panel and the number of rows and columns of the grid.
+    """
+
+    columns = min(panel_count, GRID_MAX_COLUMNS if columns is None else max(1, columns))
+    rows = -(-panel_count // columns)
+
+    fig, axes = plt.subplots(rows, columns, figsize=(GRID_PANEL_SIZE[0] * columns, GRID_PANEL_SIZE[1] * rows), squeeze=False, layout="constrained")
+    axes = axes.ravel()
+    for ax in axes[panel_count:]: # the last row may be incomplete
+        ax.remove()
+
+    for ax, title in zip(axes, panel_titles):
+        ax.set_title(title)
+
+    if labels[0]:
+        fig.suptitle(labels[0])
+    if labels[1]:
+        fig.supxlabel(labels[1])
+    if labels[2]:
+        fig.supylabel(labels[2])
+
+    return fig, list(axes[:panel_count]), (rows, columns)
+
+
+def plot_heatmap_grid(panels, min_max_values, output_file, labels, panel_titles, columns=None, over_value_color="darkred", origin="lower", full_resolution=False):
+    """
+        Generate a grid of heatmaps in a single figure, sharing the same color scale and colorbar.
+
+        Args:
+            panels (list): The panels, as 3-tuples with the x-axis ticks, the y-axis ticks and the data matrix (see plot_heatmap).
+            min_max_values (tuple): indicates the minimum and maximum values across every panel, respectively.
+            output_file (str | file): The path of the file, or the file object, where the generated image will be saved.
+            labels (list): The title, x-axis label and y-axis label shared by the panels.
+            panel_titles (list): The title of each panel.
+            columns (int | None): The number of columns of the grid, or None for up to GRID_MAX_COLUMNS.
+            over_value_color (str): The color to be used for coloring over values. Defaults to darkred.
+            origin (str): Indicates where the [0,0] coordinates should be placed (lower, upper). Defaults to "lower".
+            full_resolution (bool): If false, matrices larger than the pixels available in their panel are reduced (see reduce_matrix). Defaults to False.
+        Returns:
+            None
+    """
+
+    with profiling.stage("artists"):
+        fig, axes, grid_shape = create_grid_figure(len(panels), labels, panel_titles, columns)
+
+        (min_value, max_value) = min_max_values
+        norm = mcolors.Normalize(vmin=min_value, vmax=max_value) # shared, so every panel has the same colors
+        colormap = set_colormap(over_color=over_value_color)
+
+        for ax, (x_axis_ticks, y_axis_ticks, data_matrix) in zip(axes, panels):
+            data_matrix, extent = prepare_heatmap_matrix(fig, data_matrix, min_max_values, origin, full_resolution, grid_shape)
+            image = ax.imshow(data_matrix, norm=norm, cmap=colormap, origin=origin, extent=extent)
+
+            set_tick_information(ax, x_axis_ticks, "x")
+            set_tick_information(ax, y_axis_ticks, "y")
+
+        fig.colorbar(image, ax=axes)
+
+    save_figure(fig, output_file)
+
+
+def plot_contours_grid(data_matrices, min_max_values, output_file, labels, panel_titles, columns=None, data_type="int"):
+    """
+        Generate a grid of contour graphics in a single figure, sharing the same levels, color scale and colorbar.
+
+        Args:
+            data_matrices (list): The 2D numpy array of each panel.
+            min_max_values (tuple): indicates the minimum and maximum values across every panel, respectively.
+            output_file (str | file): The path of the file, or the file object, where the generated image will be saved.
+            labels (list): The title, x-axis label and y-axis label shared by the panels.
+            panel_titles (list): The title of each panel.
+            columns (int | None): The number of columns of the grid, or None for up to GRID_MAX_COLUMNS.
+            data_type (str): indicates if the contour graphics are generated out of "int" or "float" data.
+        Returns:
+            None
+    """
+
+    with profiling.stage("artists"):
+        fig, axes, _ = create_grid_figure(len(data_matrices), labels, panel_titles, columns)
+
+        levels = get_levels(min_max_values, data_type)
+        for ax, data_matrix in zip(axes, data_matrices):
+            filled_contours = draw_contours(ax, data_matrix, min_max_values, levels)
+
+        fig.colorbar(filled_contours, ax=axes)
+
+    save_figure(fig, output_file)
+
+
+def plot_line_graphic(x_axis_ticks, y_axis_ticks, legends, data_vector, output_file, labels, scaling_law, no_marker, error_bands=None):
     """
         Generates a line graph with at least one line. Each line is plotted using each list of data_vector.
 
@@ -265,15 +850,16 @@ def plot_line_graphic(x_axis_ticks, y_axis_ticks, legends, data_vector, output_f
                                   - The location of the y-axis ticks.
                                   - The values of the y-axis ticks.
             legends (list): The legends of each data set (list) in data_vector.
-            data_vector (list[list]): A list of lists containing the data to be plotted.
-                                      Each list represents one of the lines of the graphic.
-            output_file (str): The name of the file where the generated image will be saved.
+            data_vector (DataSets | list[list]): The data to be plotted (see datasets.DataSets), or a list of lists.
+                                      Each data set represents one of the lines of the graphic.
+            output_file (str | file): The path of the file, or the file object, where the generated image will be saved.
             labels (list): A list of labels to be included in the graphic. Should contain:
                            - labels[0]: The title of the graphic.
                            - labels[1]: The label for the x-axis.
                            - labels[2]: The label for the y-axis.
             scaling_law (bool): Indicates if the scaling law of (VARAS, 2007) should be plotted.
             no_marker (bool): Indicates if the data points should be marked or not.
+            error_bands (list): The lower and upper limits of the shaded band drawn around each line, or None for no bands. Defaults to None.
         Returns:
             None
 
@@ -289,32 +875,40 @@ def plot_line_graphic(x_axis_ticks, y_axis_ticks, legends, data_vector, output_f
     x_tick_locations, x_tick_values = x_axis_ticks
     y_tick_locations, y_tick_values = y_axis_ticks
 
-    fig, ax = plt.subplots()
+    with profiling.stage("artists"):
+        fig, ax = plt.subplots()
 
-    set_tick_information(ax, x_axis_ticks, "x")
-    set_tick_information(ax, y_axis_ticks, "y")
+        set_tick_information(ax, x_axis_ticks, "x")
+        set_tick_information(ax, y_axis_ticks, "y")
 
-    for data_line in data_vector:
-        if not x_tick_locations and x_tick_values:
-            if len(x_tick_values) != len(data_line):
-                sys.stderr.write(f"The number of elements in the x-axis ({len(x_tick_values)}) is different from the number os elements in the y-axis ({len(data_line)}).\n")
-                exit()
+        handles = [] # the error bands have no legend
+        for line_number, data_line in enumerate(data_vector):
+            if len(x_tick_locations) == 0 and len(x_tick_values) > 0:
+                if len(x_tick_values) != len(data_line):
+                    raise InvalidDataError(f"The number of elements in the x-axis ({len(x_tick_values)}) is different from the number os elements in the y-axis ({len(data_line)}).")
 
-            plt.plot(x_tick_values, data_line, '-', marker=marker)
-        else:
-            plt.plot(data_line, "-", marker=marker)
+                x_values = x_tick_values
+                lines = plt.plot(x_tick_values, data_line, '-', marker=marker)
+            else:
+                x_values = np.arange(len(data_line))
+                lines = plt.plot(data_line, "-", marker=marker)
+            handles.extend(lines)
 
-    if scaling_law:
-        legends.append("T/N=2/a")
-        x, y = get_scaling_law()
-        plt.plot(x,y)
+            if error_bands is not None:
+                lower_limits, upper_limits = error_bands[line_number]
+                plt.fill_between(x_values, lower_limits, upper_limits, color=lines[0].get_color(), alpha=0.2, linewidth=0)
 
-    set_labels(labels)
+        if scaling_law:
+            legends.append("T/N=2/a")
+            x, y = get_scaling_law()
+            handles.extend(plt.plot(x,y))
 
-    if len(legends) > 1:
-        plt.legend(legends)
+        set_labels(labels)
 
-    fig.savefig(f"out/{output_file}")
+        if len(legends) > 1:
+            plt.legend(handles, legends)
+
+    save_figure(fig, output_file)
 
 
 def plot_scatter_graphic(x_axis_ticks, y_axis_ticks, legends, data_vector, output_file, labels):
@@ -329,9 +923,9 @@ def plot_scatter_graphic(x_axis_ticks, y_axis_ticks, legends, data_vector, outpu
                                   - The location of the y-axis ticks.
                                   - The values of the y-axis ticks.
             legends (list): The legends of each data set (list) in data_vector.
-            data_vector (list[list]): A list of lists containing the data to be plotted.
-                                      Each list represents one of the lines of the graphic.
-            output_file (str): The name of the file where the generated image will be saved.
+            data_vector (DataSets | list[list]): The data to be plotted (see datasets.DataSets), or a list of lists.
+                                      Each data set represents one of the lines of the graphic.
+            output_file (str | file): The path of the file, or the file object, where the generated image will be saved.
             labels (list): A list of labels to be included in the graphic. Should contain:
                            - labels[0]: The title of the graphic.
                            - labels[1]: The label for the x-axis.
@@ -348,20 +942,21 @@ def plot_scatter_graphic(x_axis_ticks, y_axis_ticks, legends, data_vector, outpu
     x_tick_locations, x_tick_values = x_axis_ticks
     y_tick_locations, y_tick_values = y_axis_ticks
 
-    fig, ax = plt.subplots()
+    with profiling.stage("artists"):
+        fig, ax = plt.subplots()
 
-    if not x_tick_locations:
-        sys.stderr.write(f"x-axis tick locations are required.\n")
-        exit()
+        if len(x_tick_locations) == 0:
+            raise InvalidDataError(f"x-axis tick locations are required.")
 
-    set_tick_information(ax, x_axis_ticks, "x")
-    set_tick_information(ax, y_axis_ticks, "y")
+        set_tick_information(ax, x_axis_ticks, "x")
+        set_tick_information(ax, y_axis_ticks, "y")
 
-    plt.scatter(x_tick_locations, data_vector[0])
+        categories = x_axis_ticks.location_labels() if isinstance(x_axis_ticks, AxisTicks) else x_tick_locations
+        plt.scatter(categories, data_vector[0]) # text locations place the points at consecutive positions, labeled by the tick locations
 
-    set_labels(labels)
+        set_labels(labels)
 
-    if len(legends) > 1:
-        plt.legend(legends)
+        if len(legends) > 1:
+            plt.legend(legends)
 
-    fig.savefig(f"out/{output_file}")
\ No newline at end of file
+    save_figure(fig, output_file)
\ No newline at end of file
@@ -1,20 +1,207 @@
+import bz2
+import functools
+import glob
+import gzip
+import hashlib
+import itertools
+import json
+import lzma
 import math
 import numpy as np
-import sys
+import os
+import pickle
+import re
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from datasets import AxisTicks, ConfigurationData, DataSets, EnvironmentHeatmapData, HeatmapData, as_dtype, check_dtype
+from errors import InputNotFoundError, InvalidDataError, InvalidOptionError, PlotterError
+
+ENV_HEATMAP_CHUNK_LINES = 4096 # number of lines of an environment heatmap file parsed at once
+CONFIGURATION_LOADING_THREADS = 8 # maximum number of data files of a configuration file loaded concurrently
+
+CACHE_VERSION = 4 # must be increased whenever the result of a cached function changes for the same input
+CACHE_ENABLED = True
+CACHE_DIRECTORY = ".cache/processing"
+CACHE_SIZE_LIMIT = 512 * 2 ** 20 # in bytes
+
+# extension -> (magic bytes, open function) of the compressed input formats read transparently
+COMPRESSION_FORMATS = {
+    ".gz": (b"\x1f\x8b", gzip.open),
+    ".bz2": (b"BZh", bz2.open),
+    ".xz": (b"\xfd7zXZ\x00", lzma.open),
+}
+
+DATA_STORE_METADATA = "metadata.json"
+ROW_MARKER_NONE = 0
+ROW_MARKER_SINGLE_DOOR = 1 # lines beginning with #1
+ROW_MARKER_PREFIX = 2 # lines beginning with *value
+
+REPLICATE_STATISTICS = ("mean", "std", "sem", "ci", "median", "min", "max")
+CONFIDENCE_INTERVAL_Z = 1.959963984540054 # standard normal quantile of a 95% confidence interval
+ERROR_BANDS = ("std", "sem", "ci", "minmax")
+STREAMING_FILE_SIZE = 64 * 2 ** 20 # in bytes, data files larger than this are reduced while they are read (see stream_experimental_data_statistics)
+STREAMING_CHUNK_BYTES = 4 * 2 ** 20 # size of the chunks read from data files that are streamed
+DERIVE_OPERATIONS = ("difference", "ratio", "quotient", "normalize") # operations of derive_data_sets
+NORMALIZATIONS = ("max", "first", "sum", "mean")
+
+def configure_cache(enabled=None, directory=None, size_limit=None):
+    """
+        Configure the on-disk cache of parsed data. Arguments left as None keep their current value.
+
+        Args:
+            enabled (bool): Indicates if the results of the processing functions should be cached.
+            directory (str): The directory where the cached results are stored.
+            size_limit (int): The maximum size, in bytes, of the cache. The least recently used results are evicted first.
+        Returns:
+            None
+    """
+
+    global CACHE_ENABLED, CACHE_DIRECTORY, CACHE_SIZE_LIMIT
+
+    if enabled is not None:
+        CACHE_ENABLED = enabled
+    if directory is not None:
+        CACHE_DIRECTORY = directory
+    if size_limit is not None:
+        CACHE_SIZE_LIMIT = size_limit
+
+def clear_cache():
+    """
+        Remove every result stored in the on-disk cache.
+    """
+
+    if not os.path.isdir(CACHE_DIRECTORY):
+        return
+
+    for entry in os.scandir(CACHE_DIRECTORY):
+        if entry.is_file():
+            os.remove(entry.path)
+
+def evict_cache_entries():
+    """
+        Remove the least recently used results until the cache fits into CACHE_SIZE_LIMIT.
+        Cache hits update the modification time of the entries, which is used to determine their last use.
+    """
+
+    entries = [(entry.stat().st_mtime_ns, entry.stat().st_size, entry.path) for entry in os.scandir(CACHE_DIRECTORY) if entry.is_file()]
+    cache_size = sum(size for _, size, _ in entries)
+
+    for _, size, path in sorted(entries):
+        if cache_size <= CACHE_SIZE_LIMIT:
+            break
+
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass # already removed by another process
+
+        cache_size -= size
+
+def load_cached_result(key):
+    """
+        Load a result from the on-disk cache.
+
+        Args:
+            key (str): The key of the result.
+        Returns:
+            object | None: The result, or None if it isn't cached.
+    """
+
+    cache_file = os.path.join(CACHE_DIRECTORY, hashlib.sha256(key.encode()).hexdigest() + ".pkl")
+
+    try:
+        with open(cache_file, "rb") as file:
+            result = pickle.load(file)
+
+        os.utime(cache_file)  # marks the entry as recently used
+        return result
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return None  # cache miss
+
+def store_cached_result(key, result):
+    """
+        Store a result in the on-disk cache, evicting the least recently used results if the cache exceeds CACHE_SIZE_LIMIT.
 
-class NoticeError(Exception):
-    """Exception raised to indicate that an error occurred elsewhere and has already been handled, but the program must be terminated. It is used to ensure that files opened within functions in the call tree are properly closed.
+        Args:
+            key (str): The key of the result.
+            result (object): The result, which must be picklable.
+        Returns:
+            None
+    """
+
+    cache_file = os.path.join(CACHE_DIRECTORY, hashlib.sha256(key.encode()).hexdigest() + ".pkl")
+
+    try:
+        os.makedirs(CACHE_DIRECTORY, exist_ok=True)
+        with tempfile.NamedTemporaryFile("wb", dir=CACHE_DIRECTORY, suffix=".tmp", delete=False) as file:
+            pickle.dump(result, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+        os.replace(file.name, cache_file)  # atomic, so concurrent processes never read a partial entry
+        evict_cache_entries()
+    except OSError:
+        pass  # the cache is only an optimization
+
+def cached(function):
+    """
+        Decorator that stores the results of a processing function in the on-disk cache.
 
-    Attributes:
-        message (str): explanation of the error
+        The results are keyed by the name of the function, the path, modification time and size of the input file (the first argument) and the remaining arguments.
+        Results are only stored if the function returns normally.
     """
 
-    def __init__(self, message=""):
-        self.message = message
-        super().__init__(self.message)
+    @functools.wraps(function)
+    def wrapper(filename, *args, **kwargs):
+        if not CACHE_ENABLED:
+            return function(filename, *args, **kwargs)
+
+        try:
+            file_status = os.stat(filename)
+        except OSError:
+            return function(filename, *args, **kwargs)  # the function itself reports the error
+
+        key = repr((CACHE_VERSION, function.__name__, os.path.abspath(filename), file_status.st_mtime_ns, file_status.st_size, args, sorted(kwargs.items())))
+
+        result = load_cached_result(key)
+        if result is not None:
+            return result
 
-    def __str__(self):
-        return f"[Error]: {self.message}"
+        result = function(filename, *args, **kwargs)
+        store_cached_result(key, result)
+
+        return result
+
+    return wrapper
+
+def open_input(filename, mode="r"):
+    """
+        Open an input file, decompressing it on the fly if it is compressed with gzip, bzip2 or xz.
+        The compression is detected by the extension of the file (.gz, .bz2 or .xz) or, failing that, by its first bytes.
+
+        Args:
+            filename (str): The name of the input file.
+            mode (str): "r" to read text or "rb" to read bytes. Defaults to "r".
+        Returns:
+            file object: The opened file, which yields the decompressed content.
+
+        Raises:
+            FileNotFoundError: If the file doesn't exist.
+    """
+
+    text_mode = "rt" if mode == "r" else mode
+
+    extension = os.path.splitext(filename)[1].lower()
+    if extension in COMPRESSION_FORMATS:
+        return COMPRESSION_FORMATS[extension][1](filename, text_mode)
+
+    with open(filename, "rb") as file:
+        first_bytes = file.read(6)
+
+    for magic_bytes, open_function in COMPRESSION_FORMATS.values():
+        if first_bytes.startswith(magic_bytes):
+            return open_function(filename, text_mode)
+
+    return open(filename, mode)
 
 def extract_tick_information(line):
     """
@@ -34,209 +221,468 @@ def extract_tick_information(line):
 
     return line.split(" ")
 
-def suppress_exits(matrix: list[list], wall_threshold: float):
+def suppress_exits(matrix: np.ndarray, wall_threshold: float):
     """
         Suppress exits located on the edges of a reticulate by assigning the wall_threshold value to them
 
         Args:
-            matrix: a list of lists.
+            matrix: a 2 dimension numpy array.
             wall_threshold (float): The threshold from which a value is considered to be an over value. Must be positive.
 
         Returns:
             the original matrix with the necessary adjustments
     """
 
-    for i, line in enumerate(matrix):
-        for j, column in enumerate(line):
+    border = np.zeros(matrix.shape, dtype=bool)
+    border[[0, -1], :] = True
+    border[:, [0, -1]] = True
 
-            if i == 0 or i == len(matrix) - 1:
-                if line[j] < wall_threshold:
-                    matrix[i][j] = wall_threshold
-            elif j == 0 or j == len(line) - 1:
-                if line[j] < wall_threshold:
-                    matrix[i][j] = wall_threshold
+    matrix[border & (matrix < wall_threshold)] = wall_threshold
 
     return matrix
 
+def parse_env_heatmap_chunk(chunk, len_of_lines, first_line_number):
+    """
+        Parse a chunk of data lines of an environment heatmap file into a 2 dimension numpy array.
+
+        Args:
+            chunk (list[str]): consecutive lines of the file. Empty lines are ignored.
+            len_of_lines (int): the number of elements each line must contain.
+            first_line_number (int): the number of the first line of the chunk, used in the error messages.
+
+        Returns:
+            np.ndarray: an array with one row for each non-empty line of the chunk.
+
+        Raises:
+            ValueError: if a non-numeric value is found.
+            InvalidDataError: if a line contains a number of elements different from len_of_lines.
+    """
+
+    try:
+        data = np.loadtxt([line for line in chunk if line != "\n"], dtype=float, comments=None, ndmin=2)
+        if data.shape[0] == 0 or data.shape[1] == len_of_lines:
+            return data
+    except ValueError:
+        pass  # either a non-numeric value or lines of different lengths, which are told apart below.
+
+    for line_number, line in enumerate(chunk, start=first_line_number):
+        if line == "\n":
+            continue
 
+        number_of_elements = len(line.split())
+        if number_of_elements != len_of_lines:
+            raise InvalidDataError(f"Line {line_number} contains a different number of elements ({number_of_elements}) compared to the first line ({len_of_lines}).")
 
-def process_env_heatmap_data(filename: str, wall_threshold: float, dimension: str, supress_heatmap_exits: bool):
+    raise ValueError
+
+@cached
+def process_env_heatmap_data(filename: str, wall_threshold: float, dimension: str, supress_heatmap_exits: bool, dtype: str = "float64"):
     """
         Process data that will be plotted into an environment heatmap.
 
+        The data lines are parsed in chunks of ENV_HEATMAP_CHUNK_LINES lines straight into a growable numpy buffer, so the whole text of the file is never held in memory.
+
         Args:
             filename (str): The name of the file containing the axis tick configurations and the data.
             wall_threshold (float): The threshold from which a value is considered to be an over value. For a negative threshold the values below it are considered.
             dimension (str): Indicates the dimension to which the extracted data will be plotted. Used to ignore z-axis tick information for 2d graphics.
             supress_heatmap_exits (bool): if true, indicates that the exits located on the edges of the heatmap must be suppressed (assigned the wall_threshold value).
+            dtype (str): the type of the matrix, one of datasets.DTYPES. Integer types round the values. Defaults to float64.
 
         Returns:
-            A tuple containing:
-                - A 2-tuple with the locations and values of the x-axis ticks.
-                - A 2-tuple with the location and values of the y-axis ticks.
-                - A 2-tuple with the location and values of the z-axis ticks.
-                - A 2 dimension numpy array.
-                - A float, indicating the maximum value of the data (ignoring over values).
+            EnvironmentHeatmapData: the ticks of each axis (the z-axis ticks are empty for 2d graphics), the matrix and its maximum value (ignoring over values).
+
+        Raises:
+            InputNotFoundError: if the file doesn't exist.
+            InvalidDataError: if the file has no data, a non-numeric value or lines of different lengths.
+            InvalidOptionError: if DTYPE isn't one of datasets.DTYPES.
     """
 
-    data_matrix = []
-    maximum_value = -1
+    check_dtype(dtype)
 
     very_high_value = 2 ** 30 # For a negative threshold, all values equal or below it are converted to the very_high_value in order to not require further alterations in the code.
     verification_threshold = wall_threshold if wall_threshold > 0 else very_high_value
 
-    z_ticks = ([], [])
+    z_ticks = AxisTicks.empty()
     try:
-        with open(filename, "r") as file:
-            lines = file.readlines()
-
-            x_tick_locations = extract_tick_information(lines[0])
-            x_tick_values = extract_tick_information(lines[1])
-            y_tick_locations = extract_tick_information(lines[2])
-            y_tick_values = extract_tick_information(lines[3])
+        with open_input(filename) as file:
+            x_ticks = AxisTicks.from_text(extract_tick_information(file.readline()), extract_tick_information(file.readline()))
+            y_ticks = AxisTicks.from_text(extract_tick_information(file.readline()), extract_tick_information(file.readline()))
 
-            line_index = 4
+            z_tick_locations = extract_tick_information(file.readline())
+            z_tick_values = extract_tick_information(file.readline())
             if dimension == "3d":
-                z_tick_locations = extract_tick_information(lines[line_index])
-                z_tick_values = extract_tick_information(lines[line_index + 1])
-                z_ticks = (z_tick_locations, z_tick_values)
+                z_ticks = AxisTicks.from_text(z_tick_locations, z_tick_values)
+
+            first_data_line = file.readline()
+            len_of_lines = len(first_data_line.split())
+            if len_of_lines == 0:
+                raise InvalidDataError(f"No data found in {filename}.")
+
+            # the number of rows is estimated from the size of the first one, and the buffer grows if the estimate is too low.
+            remaining_size = os.fstat(file.fileno()).st_size - file.tell()
+            capacity = max(ENV_HEATMAP_CHUNK_LINES, remaining_size // len(first_data_line) + 1)
+            data_matrix = np.empty((capacity, len_of_lines), dtype=dtype) # each chunk is converted as it is copied, so no float64 copy of the whole matrix is made
+            data_matrix[0] = as_dtype(np.array(first_data_line.split(), dtype=float), dtype)
+            number_of_rows = 1
+
+            line_number = 1
+            while chunk := list(itertools.islice(file, ENV_HEATMAP_CHUNK_LINES)):
+                chunk_data = parse_env_heatmap_chunk(chunk, len_of_lines, line_number)
+                line_number += len(chunk)
+
+                if number_of_rows + len(chunk_data) > capacity:
+                    capacity = max(2 * capacity, number_of_rows + len(chunk_data))
+                    data_matrix.resize((capacity, len_of_lines), refcheck=False)
+
+                data_matrix[number_of_rows:number_of_rows + len(chunk_data)] = as_dtype(chunk_data, dtype)
+                number_of_rows += len(chunk_data)
+
+            data_matrix.resize((number_of_rows, len_of_lines), refcheck=False)
+    except PlotterError:
+        raise
+    except FileNotFoundError:
+        raise InputNotFoundError(f"File {filename} not found.")
+    except ValueError:
+        raise InvalidDataError(f"Non-numeric value found in the data.")
 
-            line_index += 2
+    if wall_threshold < 0:
+        data_matrix[data_matrix <= wall_threshold] = very_high_value
 
-            first_data_line = lines[line_index].strip("\n ").split()
-            line_index += 1
-            if wall_threshold < 0:
-                first_data_line = [very_high_value if float(x) <= wall_threshold else x for x in first_data_line]
+    # the first data line doesn't take part in the maximum value.
+    remaining_lines = data_matrix[1:]
+    maximum_value = np.max(remaining_lines, where=(remaining_lines > -1) & (remaining_lines < verification_threshold), initial=-1).item()
 
-            data_matrix.append(list(map(float, first_data_line)))
+    if supress_heatmap_exits:
+        suppress_exits(data_matrix, verification_threshold)
 
-            len_of_lines = len(first_data_line)
-            for line_number, line in enumerate(lines[line_index:], start=1):
-                if line == "\n":
-                    continue
+    return EnvironmentHeatmapData(x_ticks, y_ticks, z_ticks, data_matrix, maximum_value)
 
-                line = line.strip("\n ").split()
+def parse_replicate_rows(rows, dtype):
+    """
+        Parse every row of replicates at once.
 
-                if len(line) != len_of_lines:
-                    sys.stderr.write(f"Line {line_number} contains a different number of elements ({len(line)}) compared to the first line ({len_of_lines}).\n")
-                    exit()
+        All rows are parsed into a single 2D numpy array. If the rows contain different numbers of replicates, they are parsed into a
+        flat array instead.
 
-                if wall_threshold < 0:
-                    line = [very_high_value if float(x) <= wall_threshold else x for x in line]
+        Args:
+            rows (list[str]): The rows of replicates, as whitespace separated strings. Empty rows are not allowed.
+            dtype (type): The type of the replicates (int or float).
 
-                line_data = list(map(float, line))
-                for v in line_data:
-                    if maximum_value < v < verification_threshold:
-                        maximum_value = v
+        Returns:
+            tuple: A 2-tuple with the replicates and, for a flat array, the index where each row begins followed by the total number of replicates (None for a 2D array).
 
-                data_matrix.append(line_data)
-    except FileNotFoundError:
-        sys.stderr.write(f"File {filename} not found.\n")
-        exit()
+        Raises:
+            ValueError: If some replicate is not a number of the given type.
+    """
+
+    if len(rows) == 0:
+        return np.array([], dtype=dtype), np.array([0])
+
+    try:
+        return np.loadtxt(rows, dtype=dtype, comments=None, ndmin=2), None
     except ValueError:
-        sys.stderr.write(f"Non-numeric value found in the data.\n")
-        exit()
+        pass  # either a non-numeric value or rows of different lengths. The latter is handled below.
 
-    if supress_heatmap_exits:
-        suppress_exits(data_matrix, verification_threshold)
+    split_rows = [row.split() for row in rows]
+    counts = np.fromiter((len(row) for row in split_rows), dtype=np.intp, count=len(split_rows))
+    values = np.array([value for row in split_rows for value in row]).astype(dtype)
+
+    return values, np.concatenate(([0], np.cumsum(counts)))
 
-    return (x_tick_locations, x_tick_values), (y_tick_locations, y_tick_values), z_ticks, np.array(data_matrix), maximum_value
+def get_dispersion_statistics(counts, squared_deviations):
+    """
+        Compute the sample standard deviation (0 for rows with a single replicate), the standard error of the mean and the half-width of
+        its 95% confidence interval from the number of replicates and the sum of their squared deviations from the mean.
+
+        Returns:
+            dict: An np.ndarray with the value of each row for std, sem and ci.
+    """
+
+    std = np.sqrt(squared_deviations / np.maximum(counts - 1, 1))
+    sem = std / np.sqrt(counts)
+
+    return {"std": std, "sem": sem, "ci": CONFIDENCE_INTERVAL_Z * sem}
+
+def compute_replicate_statistics(replicates, row_offsets=None, statistics=REPLICATE_STATISTICS):
+    """
+        Compute statistics of every row of an array of replicates at once, without iterating over the rows.
 
-def process_heatmap_data(filename, ignore_marked_data, data_type, force_over_values):
+        Args:
+            replicates (np.ndarray): Either a 2D array with one row of replicates per line, or a flat array with the replicates of all lines.
+            row_offsets (np.ndarray): For a flat array, the index where each row begins, followed by the total number of replicates. None for a 2D array.
+            statistics (tuple): The statistics to be computed, among REPLICATE_STATISTICS:
+                                - mean, median, min and max.
+                                - std: the sample standard deviation (0 for rows with a single replicate).
+                                - sem: the standard error of the mean.
+                                - ci: the half-width of the 95% confidence interval of the mean, using the normal approximation.
+
+        Returns:
+            dict: An np.ndarray with the value of each row for every requested statistic, and for "count" (the number of replicates of each row).
+                  min and max keep the type of the replicates, while the other statistics are floats.
+    """
+
+    if row_offsets is None:
+        counts = np.full(replicates.shape[0], replicates.shape[1])
+    else:
+        counts = np.diff(row_offsets)
+        starts = row_offsets[:-1]
+
+    result = {"count": counts}
+    if len(counts) == 0:
+        result.update({name: np.array([], dtype=replicates.dtype if name in ("min", "max") else float) for name in statistics})
+        return result
+
+    if row_offsets is None:
+        sums = replicates.sum(axis=1, dtype=float)
+    else:
+        sums = np.add.reduceat(replicates, starts, dtype=float)
+    mean = sums / counts
+
+    if "mean" in statistics:
+        result["mean"] = mean
+    if "min" in statistics:
+        result["min"] = replicates.min(axis=1) if row_offsets is None else np.minimum.reduceat(replicates, starts)
+    if "max" in statistics:
+        result["max"] = replicates.max(axis=1) if row_offsets is None else np.maximum.reduceat(replicates, starts)
+
+    if {"std", "sem", "ci"} & set(statistics):
+        if row_offsets is None:
+            squared_deviations = ((replicates - mean[:, np.newaxis]) ** 2).sum(axis=1)
+        else:
+            squared_deviations = np.add.reduceat((replicates - np.repeat(mean, counts)) ** 2, starts)
+
+        for name, value in get_dispersion_statistics(counts, squared_deviations).items():
+            if name in statistics:
+                result[name] = value
+
+    if "median" in statistics:
+        if row_offsets is None:
+            result["median"] = np.median(replicates, axis=1)
+        else:
+            # sorting by row and then by value leaves the replicates of each row sorted in place
+            sorted_replicates = replicates[np.lexsort((replicates, np.repeat(np.arange(len(counts)), counts)))]
+            result["median"] = (sorted_replicates[starts + (counts - 1) // 2] + sorted_replicates[starts + counts // 2]) / 2
+
+    return result
+
+def summarize_replicate_rows(rows, dtype):
+    """
+        Compute the minimum, maximum and mean of every row of replicates at once.
+
+        Args:
+            rows (list[str]): The rows of replicates, as whitespace separated strings. Empty rows are not allowed.
+            dtype (type): The type of the replicates (int or float).
+
+        Returns:
+            tuple: A 3-tuple of np.ndarray with the minimum, maximum and mean of each row.
+
+        Raises:
+            ValueError: If some replicate is not a number of the given type.
+    """
+
+    return summarize_replicate_array(*parse_replicate_rows(rows, dtype))
+
+def summarize_replicate_array(replicates, row_offsets=None):
+    """
+        Compute the minimum, maximum and mean of every row of an array of replicates.
+
+        Args:
+            replicates (np.ndarray): Either a 2D array with one row of replicates per line, or a flat array with the replicates of all lines.
+            row_offsets (np.ndarray): For a flat array, the index where each row begins, followed by the total number of replicates. None for a 2D array.
+
+        Returns:
+            tuple: A 3-tuple of np.ndarray with the minimum, maximum and mean of each row.
+    """
+
+    statistics = compute_replicate_statistics(replicates, row_offsets, ("min", "max", "mean"))
+
+    return statistics["min"], statistics["max"], statistics["mean"]
+
+def is_data_store(path):
+    """
+        Indicate if PATH is a binary data store created by ingest.py instead of a text data file.
+    """
+
+    return os.path.isfile(os.path.join(path, DATA_STORE_METADATA))
+
+def load_data_store(path):
+    """
+        Open a binary data store created by ingest.py. The arrays are memory-mapped, so only the pages actually used are read from the disk.
+
+        Args:
+            path (str): The directory of the data store.
+
+        Returns:
+            tuple: A 5-tuple containing:
+                - A dict with the metadata of the store, including the command line of the original file.
+                - The replicates, either as a 2D array (lines of equal length) or as a flat array.
+                - For a flat array, the index where each row begins, followed by the total number of replicates. None otherwise.
+                - An array with the marker of each row (ROW_MARKER_NONE, ROW_MARKER_SINGLE_DOOR or ROW_MARKER_PREFIX).
+                - An array with the value of the *value prefix of each row (NaN for rows without a prefix).
+    """
+
+    with open(os.path.join(path, DATA_STORE_METADATA)) as file:
+        metadata = json.load(file)
+
+    replicates = np.load(os.path.join(path, "replicates.npy"), mmap_mode="r")
+    row_offsets = np.load(os.path.join(path, "row_offsets.npy"), mmap_mode="r") if replicates.ndim == 1 else None
+    row_markers = np.load(os.path.join(path, "row_markers.npy"), mmap_mode="r")
+    row_prefixes = np.load(os.path.join(path, "row_prefixes.npy"), mmap_mode="r")
+
+    return metadata, replicates, row_offsets, row_markers, row_prefixes
+
+@cached
+def process_heatmap_data(filename, ignore_marked_data, data_type, force_over_values, dtype="float64"):
     """
         Process data that can be plotted into a heatmap or into a contour graphic.
         The data is read from a single file, processed and then returned as a square matrix.
 
         Args:
-            filename (str): the name of the file containing the data.
+            filename (str): the name of the file containing the data, or of a binary data store created by ingest.py.
             ignore_marked_data (bool): indicates if data on lines beginning with '#1' must be ignored when calculating min/max.
             data_type (str): indicates whether the data contained on the FILENAME is of type 'int' or 'float'.
             force_over_values (bool): indicates if over values (on lines beginning with #1) must be forced to be higher (in order for them to be colored darkred).
+            dtype (str): the type of the matrix, one of datasets.DTYPES. Integer types round the means of the lines. Defaults to float64.
 
         Returns:
-            tuple (np.ndarray, tuple(float, float)):
-                A tuple containing:
-                - An array reshaped into a square matrix.
-                - Another tuple containing two float numbers representing the min and max values of the data processed.
+            HeatmapData: the means of the lines reshaped into a square matrix, and a 2-tuple with the min and max values of the data processed.
 
         Notes:
             - It is expected that the input file contains 3 lines without simulation data at the beginning.
             - The remaining lines of the file must each contain at least one data value.
             - Lines beginning with '#1' indicate a set of simulations done in a room with only one door and are ignored when calculating min/max values.
             - Data values equal to -1 refer to simulations where one of the doors was not accessible and should be ignored.
+            - A line whose minimum (or maximum) is -1 doesn't take part in the calculation of the min (or max) value.
+
+        Raises:
+            InvalidOptionError: if DATA_TYPE is neither 'int' nor 'float', or DTYPE isn't one of datasets.DTYPES.
+            InputNotFoundError: if the file doesn't exist.
+            InvalidDataError: if there is a non-numeric value or the number of lines can't form a square matrix.
     """
 
-    data_vector = []
-    min_value = math.inf
-    max_value = -math.inf
+    if data_type == "int":
+        value_type = int
+    elif data_type == "float":
+        value_type = float
+    else:
+        raise InvalidOptionError(f"Unknow data type on process_heatmap_data.")
+    check_dtype(dtype)
 
     try:
-        with open(filename) as file:
-            for _ in range(3):
-                file.readline()  # ignore the lines that don't contain simulation data on the beggining of the file.
+        if is_data_store(filename):
+            _, replicates, row_offsets, row_markers, _ = load_data_store(filename)
+            marked_rows = np.asarray(row_markers == ROW_MARKER_SINGLE_DOOR)
+            row_minimums, row_maximums, data_vector = summarize_replicate_array(replicates, row_offsets)
+        else:
+            with open_input(filename) as file:
+                for _ in range(3):
+                    file.readline()  # ignore the lines that don't contain simulation data on the beggining of the file.
 
-            while True:
-                line = file.readline()
+                rows = [line for line in file.read().splitlines() if line.strip() != ""]
 
-                if line == "":
-                    break  # EOF reached
-
-                current_line_data = line.strip("\n ").split(" ")
-                if current_line_data[0] == "#1":
-                    marked_data = True
-                    current_line_data = current_line_data[1:]
-                else:
-                    marked_data = False
+            marked_rows = np.fromiter((row.startswith("#1") for row in rows), dtype=bool, count=len(rows))
+            rows = [row[2:] if marked else row for row, marked in zip(rows, marked_rows)]
 
-                if data_type == "int":
-                    data_value = list(map(int, current_line_data))
-                elif data_type == "float":
-                    data_value = list(map(float,current_line_data))
-                else:
-                    sys.stderr.write(f"Unknow data type on process_heatmap_data.\n")
-                    exit()
+            row_minimums, row_maximums, data_vector = summarize_replicate_rows(rows, value_type)
+    except FileNotFoundError:
+        raise InputNotFoundError(f"File {filename} not found.")
+    except ValueError:
+        raise InvalidDataError(f"Non-numeric value found in the data.")
 
-                if not marked_data or not ignore_marked_data:
-                    min_current = min(data_value)
-                    max_current = max(data_value)
-                    if min_current != -1 and min_current < min_value:
-                        min_value = min_current
+    considered_rows = ~marked_rows if ignore_marked_data else np.ones(len(marked_rows), dtype=bool)
 
-                    if max_current != -1 and max_current > max_value:
-                        max_value = max_current
+    valid_minimums = row_minimums[considered_rows & (row_minimums != -1)]
+    valid_maximums = row_maximums[considered_rows & (row_maximums != -1)]
+    min_value = valid_minimums.min().item() if valid_minimums.size > 0 else math.inf
+    max_value = valid_maximums.max().item() if valid_maximums.size > 0 else -math.inf
 
-                if marked_data and force_over_values:
-                    data_value = [x * 2 for x in data_value] # by making the values higher, the generated contours will be correct.
-
-                data_vector.append(np.mean(data_value))
-    except FileNotFoundError:
-        sys.stderr.write(f"File {filename} not found.\n")
-        exit()
-    except ValueError:
-        sys.stderr.write(f"Non-numeric value found in the data.\n")
-        exit()
+    if force_over_values:
+        data_vector[marked_rows] *= 2 # by making the values higher, the generated contours will be correct.
 
     # the square root of the number of values in data_vector must be an integer, indicating that is possible to build a square matrix out of it.
     data_vector_len = math.sqrt(len(data_vector))
     data_vector_len_truncated = int(data_vector_len)
     if abs(data_vector_len - data_vector_len_truncated) > 1e-8:
-        sys.stderr.write(f"Not enough data lines in {filename}\n")
-        exit()
+        raise InvalidDataError(f"Not enough data lines in {filename}")
+
+    return HeatmapData(as_dtype(data_vector, dtype).reshape(data_vector_len_truncated, data_vector_len_truncated), (min_value, max_value))
+
+def parse_configuration_line(line, directory):
+    """
+        Extract the data file and the optional legend from a data line of a configuration file.
+
+        Args:
+            line (str): a line of the configuration file, after the axis tick information.
+            directory (str): the directory of the configuration file, where the data file is located.
+        Returns:
+            tuple: a 2-tuple with the path of the data file and its legend (None if not given).
+    """
+
+    try:
+        data_file, legend = line.strip("\n ").split(" ")
+    except ValueError:
+        legend = None
+        data_file = line.strip("\n ")
+
+    return f"{directory}/{data_file}", legend
+
+def get_configuration_data_files(filename):
+    """
+        List the data files referenced by a configuration file, without processing them.
+
+        Args:
+            filename (str): The name of the configuration file.
+        Returns:
+            list: the paths of the data files, in the order they appear in the configuration file.
+
+        Raises:
+            FileNotFoundError: If the configuration file doesn't exist.
+    """
+
+    directory = "/".join(filename.split("/")[:-1])
+
+    with open_input(filename) as file:
+        lines = file.readlines()
 
-    return np.array(data_vector).reshape(data_vector_len_truncated, data_vector_len_truncated), (min_value, max_value)
+    return [parse_configuration_line(line, directory)[0] for line in lines[4:]]
 
-def process_configuration_file(filename):
+def get_animation_frame_files(frames):
+    """
+        List the environment heatmap files of an animation, in the order of their frames.
+
+        Args:
+            frames (str): Either a listing file, with the name of one environment heatmap file per line (relative to the directory of the listing),
+                          or a glob pattern matching every environment heatmap file. Files matched by a pattern are sorted by name, comparing
+                          the numbers in them by value (step_2 comes before step_10).
+        Returns:
+            list: the paths of the environment heatmap files.
+    """
+
+    if os.path.isfile(frames):
+        directory = os.path.dirname(frames)
+        with open_input(frames) as file:
+            return [os.path.join(directory, line.strip()) for line in file if line.strip() and not line.startswith("#")]
+
+    natural_order = lambda name: [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", name)]
+
+    return sorted(glob.glob(frames), key=natural_order)
+
+def process_configuration_file(filename, dtype="float64"):
     """
         Process information from a configuration file, which can contain the location and value of the x and y-axis ticks and must contain the name of at least one data file. Optionally, each data file can be accompanied by a legend.
+        The data files are loaded concurrently by up to CONFIGURATION_LOADING_THREADS threads.
 
         Args:
             filename (str): The name of the file that contains information about the x-axis and y-axis ticks, the names of the files with the data, and their respective legends.
+            dtype (str): The type in which the means of the data sets are kept, one of datasets.DTYPES. Integer types round the means. Defaults to float64.
         Returns:
-            tuple: a 4-tuple of two 2-tuples and two lists:
-                This first element contains a tuple with the locations and values of the x-axis ticks.
-                The second element contains a tuple with the locations and values of the y-axis ticks.
-                The third element contains a list with the legends of each data set.
-                The fourth element contains a list with the data sets (a list of lists).
+            ConfigurationData: the ticks of the x and y-axis, the legends of each data set, the means of the lines of each data set (stacked into
+                               a DataSets) and the statistics of each data set (see process_experimental_data_statistics), computed along with the means.
+        Raises:
+            InputNotFoundError: if the configuration file or one of its data files doesn't exist.
+            InvalidDataError: if there is a non-numeric value in one of the data files or in the tick locations.
+            InvalidOptionError: if DTYPE isn't one of datasets.DTYPES.
 
         Note:
             It's expected that the input file follows this structure:
@@ -249,135 +695,359 @@ def process_configuration_file(filename):
             It's assumed that the configuration file and all the files with their names inside it are located in the same directory.
     """
 
+    check_dtype(dtype)
+
     legends = []
-    data_vector = []
+    statistics = []
 
     directory = "/".join(filename.split("/")[:-1]) # extract the directory of the configuration file
 
     try:
-        with open(filename) as file:
+        with open_input(filename) as file:
             lines = file.readlines()
 
-            x_tick_locations = extract_tick_information(lines[0])
-            x_tick_values = extract_tick_information(lines[1])
-            y_tick_locations = extract_tick_information(lines[2])
-            y_tick_values = extract_tick_information(lines[3])
+            x_ticks = AxisTicks.from_text(extract_tick_information(lines[0]), extract_tick_information(lines[1]))
+            y_ticks = AxisTicks.from_text(extract_tick_information(lines[2]), extract_tick_information(lines[3]))
 
+            data_files = []
             for line in lines[4:]:
-                try:
-                    data_file, legend = line.strip("\n ").split(" ")
-                except ValueError:
-                    legend = None
-                    data_file = line.strip("\n ")
+                data_file, legend = parse_configuration_line(line, directory)
 
                 legends.append(legend)
-                data_vector.append(process_experimental_data_file(f"{directory}/{data_file}"))
+                data_files.append(data_file)
+
+        with ThreadPoolExecutor(max_workers=max(1, min(CONFIGURATION_LOADING_THREADS, len(data_files)))) as executor:
+            futures = [executor.submit(process_experimental_data_statistics, data_file) for data_file in data_files]
+
+            try:
+                for future in futures:
+                    statistics.append(future.result()) # results are collected in configuration order, preserving the order of the legends
+            except PlotterError:
+                executor.shutdown(wait=False, cancel_futures=True) # the files not yet being loaded are never loaded
+                raise
+    except PlotterError:
+        raise
     except FileNotFoundError:
-        sys.stderr.write(f"File {filename} not found.\n")
-        exit()
-    except NoticeError:
-        exit()
+        raise InputNotFoundError(f"File {filename} not found.")
 
-    return (x_tick_locations, x_tick_values), (y_tick_locations, y_tick_values), legends, data_vector
+    data_vector = DataSets.from_series([data_set["mean"] for data_set in statistics], dtype)
 
-def process_experimental_data_file(filename):
+    return ConfigurationData(x_ticks, y_ticks, legends, data_vector, statistics)
+
+@cached
+def process_experimental_data_statistics(filename):
     """
-        Process data outputed from the implementation of a cellular automaton model.
+        Process data outputed from the implementation of a cellular automaton model, computing every statistic of REPLICATE_STATISTICS for each line in a single pass.
+        Files larger than STREAMING_FILE_SIZE are reduced while they are read, without their median (see stream_experimental_data_statistics).
 
         Args:
-            filename (str): name of the file containing the data
+            filename (str): name of the file containing the data, or of a binary data store created by ingest.py.
 
         Returns:
-            list: containing the data obtained from the file.
+            dict: the statistics of the lines of the file, as returned by compute_replicate_statistics.
 
         Raises:
-            NoticeError: If the file is not found or if there are non-numeric values in its data, NoticeError is raised to indicate that the necessary actions to deal with the error were performed and that any function that calls 'process_varas_data_file' needs to terminate the program. This is done to ensure that any open file is closed.
+            InputNotFoundError: If the file is not found.
+            InvalidDataError: If there are non-numeric values in its data.
     """
 
-    data_vector = []
-
     try:
-        with open(filename) as file:
+        if is_data_store(filename):
+            _, replicates, row_offsets, _, _ = load_data_store(filename)
+            return compute_replicate_statistics(replicates, row_offsets)
+
+        if os.path.getsize(filename) > STREAMING_FILE_SIZE:
+            return stream_experimental_data_statistics(filename)
+
+        with open_input(filename) as file:
             for _ in range(3):
                 file.readline()  # ignore the lines that don't contain simulation data on the beginning of the file.
 
-            while True:
-                line = file.readline()
-
-                if line == "\n":
+            rows = []
+            for line in file:
+                if line.strip() == "":
                     continue
 
-                if line == "":
-                    break  # EOF reached
-
                 if line[0] == '*':
-                    line =  " ".join(line.split(" ")[1:]) # Ignore the first entry (example: *1.0)
+                    line = " ".join(line.split(" ")[1:]) # Ignore the first entry (example: *1.0)
 
-                current_line_data = list(map(int,line.strip("\n ").split(" ")))
+                rows.append(line)
 
-                data_vector.append(np.mean(current_line_data))
+        return compute_replicate_statistics(*parse_replicate_rows(rows, int))
     except FileNotFoundError:
-        sys.stderr.write(f"File {filename} not found.\n")
-        raise NoticeError
+        raise InputNotFoundError(f"File {filename} not found.")
     except ValueError:
-        sys.stderr.write(f"Non-numeric value found in the {filename} data.\n")
-        raise NoticeError
+        raise InvalidDataError(f"Non-numeric value found in the {filename} data.")
+
+def stream_experimental_data_statistics(filename):
+    """
+        Compute the statistics of every line of a data file while reading it in chunks of STREAMING_CHUNK_BYTES bytes, so the memory usage
+        doesn't depend on the size of the file or on the number of replicates of each line.
+
+        The replicates of each chunk are parsed at once and reduced per line, and the partial results of a line that spans several chunks are
+        merged with the parallel version of Welford's algorithm. Only a token cut by the end of a chunk is carried over to the next one.
+
+        Args:
+            filename (str): name of the data file.
 
-    return data_vector
+        Returns:
+            dict: the statistics of the lines of the file, like compute_replicate_statistics. The median can't be computed this way, so it is NaN.
 
-def varas_door_width_fig_7(legends, data_vector):
+        Raises:
+            ValueError: If there are non-numeric values in the data.
     """
-        Calculates the Tu - Te difference, where Tu stands for a simulation of the Fig. 6 (VARAS, 2007) experiment and Te stands for the same simulation but with the two columns to the left of the room without any pedestrians.
-        This difference is used to plot the Fig. 7 experiment from (VARAS, 2007).
 
-        Both legends and data_vector contain values related to Tu and Te, in alternating order.
-        The first value is a Tu, the second Te, the third Tu and so on.
+    completed_rows = [] # (count, mean, squared deviations, min, max) arrays of the lines of each chunk
+    row = np.array([0.0, 0.0, 0.0, np.inf, -np.inf]) # the same values for the line being read
+    carry = b""
+    at_line_start = True
+
+    with open_input(filename, "rb") as file:
+        for _ in range(3):
+            file.readline()  # ignore the lines that don't contain simulation data on the beginning of the file.
+
+        while True:
+            chunk = file.read(STREAMING_CHUNK_BYTES)
+            data = carry + chunk
+            if chunk:
+                cut = max(data.rfind(b" "), data.rfind(b"\n"), data.rfind(b"\t")) + 1 # the last token may continue in the next chunk
+                data, carry = data[:cut], data[cut:]
+
+            # Tokens are located in the raw bytes: each one is given the index of its segment, where segment 0 continues the line being read
+            # and every newline begins a new segment. The *value prefixes are blanked out and the remaining tokens parsed at once.
+            buffer = np.frombuffer(data, dtype=np.uint8)
+            whitespace = (buffer == ord(" ")) | (buffer == ord("\n")) | (buffer == ord("\t")) | (buffer == ord("\r"))
+            token_starts = np.flatnonzero(~whitespace & np.concatenate(([True], whitespace[:-1])))
+            token_ends = np.flatnonzero(~whitespace & np.concatenate((whitespace[1:], [True]))) + 1
+            newline_positions = np.flatnonzero(buffer == ord("\n"))
+            token_segments = np.searchsorted(newline_positions, token_starts)
+            number_of_segments = len(newline_positions) + 1
+
+            first_tokens = (np.diff(token_segments, prepend=-1) != 0) & ((token_segments > 0) | at_line_start)
+            prefixes = first_tokens & (buffer[token_starts] == ord("*")) # Ignore the first entry (example: *1.0)
+
+            if prefixes.any():
+                blanked = np.zeros(len(buffer) + 1, dtype=np.int8)
+                blanked[token_starts[prefixes]] = 1
+                blanked[token_ends[prefixes]] = -1
+                buffer = np.where(np.cumsum(blanked[:-1], dtype=np.int8) > 0, ord(" "), buffer).astype(np.uint8)
+
+            segments = token_segments[~prefixes]
+            values = np.fromstring(buffer.tobytes(), dtype=np.int64, sep=" ") if len(segments) > 0 else np.array([], dtype=np.int64)
+            if len(values) != len(segments):
+                raise ValueError(f"Non-numeric value found in {filename}")
+
+            counts = np.bincount(segments, minlength=number_of_segments).astype(float)
+            means = np.bincount(segments, weights=values, minlength=number_of_segments) / np.maximum(counts, 1)
+            squared_deviations = np.bincount(segments, weights=(values - means[segments]) ** 2, minlength=number_of_segments).astype(float) # integers when there are no values
+            minimums = np.full(number_of_segments, np.inf)
+            maximums = np.full(number_of_segments, -np.inf)
+            if values.size > 0:
+                non_empty = counts > 0
+                starts = (np.cumsum(counts) - counts)[non_empty].astype(np.intp)
+                minimums[non_empty] = np.minimum.reduceat(values, starts)
+                maximums[non_empty] = np.maximum.reduceat(values, starts)
+
+            count = row[0] + counts[0]
+            if count > 0:
+                delta = means[0] - row[1]
+                means[0] = row[1] + delta * counts[0] / count
+                squared_deviations[0] += row[2] + delta ** 2 * row[0] * counts[0] / count
+                counts[0] = count
+                minimums[0] = min(minimums[0], row[3])
+                maximums[0] = max(maximums[0], row[4])
+
+            segment_rows = np.stack((counts, means, squared_deviations, minimums, maximums))
+            completed = segment_rows[:, :-1]
+            completed_rows.append(completed[:, completed[0] > 0]) # blank lines are ignored
+            row = segment_rows[:, -1]
+
+            if len(token_starts) > 0:
+                at_line_start = bool(newline_positions.size > 0 and newline_positions[-1] > token_starts[-1])
+            elif newline_positions.size > 0:
+                at_line_start = True
+
+            if not chunk:
+                break
+
+    if row[0] > 0: # the last line doesn't end with a newline
+        completed_rows.append(row[:, np.newaxis])
+
+    counts, means, squared_deviations, minimums, maximums = np.concatenate(completed_rows, axis=1)
+    counts = counts.astype(np.int64)
+
+    result = {"count": counts, "mean": means, "median": np.full(len(counts), np.nan), "min": minimums.astype(np.int64), "max": maximums.astype(np.int64)}
+    result.update(get_dispersion_statistics(counts, squared_deviations))
+
+    return result
+
+def process_experimental_data_file(filename):
+    """
+        Process data outputed from the implementation of a cellular automaton model.
 
         Args:
-            legends (list): the legends of each data set.
-            data_vector (list[lists]): a list with the data sets
+            filename (str): name of the file containing the data, or of a binary data store created by ingest.py.
+
         Returns:
-            tuple: a 2-tuple containg two lists:
-                - the final legends
-                - the calculated Tu - Te difference for every pair of normal configuration and empty configuration vectors of data_vector.
+            list: containing the mean of each line of the file.
+
+        Raises:
+            InputNotFoundError, InvalidDataError: If the file is not found or if there are non-numeric values in its data (see process_experimental_data_statistics).
     """
 
-    if len(data_vector) % 2 != 0:
-        sys.stderr.write(f"The number of data sets must be even.\n")
-        exit()
+    return list(process_experimental_data_statistics(filename)["mean"])
 
-    normal_configuration = [u for u in data_vector[::2]]
-    empty_configuration = [e for e in data_vector[1::2]] # data sets where the two first columns at the lef of the room were empty.
+def get_error_bands(statistics, error_band):
+    """
+        Determine the lower and upper limits of the error band of each data set.
 
-    difference_data_vector = []
-    for tu, te in zip(normal_configuration, empty_configuration):
-        if len(tu) != len(te):
-            sys.stderr.write(f"O número de elementos dos vetores Tu deve ser o mesmo dos vetores Te.\n")
+        Args:
+            statistics (list[dict]): The statistics of each data set, as returned by process_experimental_data_statistics.
+            error_band (str): One of ERROR_BANDS: the mean minus and plus the standard deviation (std), the standard error (sem) or the
+                              half-width of the 95% confidence interval (ci), or the minimum and maximum replicates (minmax).
+        Returns:
+            list: A 2-tuple of np.ndarray with the lower and upper limits of each data set.
+    """
 
-        difference_data_vector.append([u - e for u, e in zip(tu, te)])
+    if error_band == "minmax":
+        return [(data_set["min"], data_set["max"]) for data_set in statistics]
 
-    legends = [i for i in legends[::2]]
+    return [(data_set["mean"] - data_set[error_band], data_set["mean"] + data_set[error_band]) for data_set in statistics]
 
-    return legends, difference_data_vector
+def parse_derive_operations(specification):
+    """
+        Parse the derived-series operations given to --derive.
 
-def varas_door_width_fig_9(legends, data_vector):
+        Args:
+            specification (str): Comma separated operations, applied in order, each one optionally followed by a colon and an argument.
+                                 For example: "difference,normalize:first" or "quotient:N".
+        Returns:
+            list: 2-tuples with the name of each operation (one of DERIVE_OPERATIONS) and its argument (None if not given).
+        Raises:
+            InvalidOptionError: if an operation is unknown or its argument is invalid.
     """
-        Calculates the T/N quotient, where T is the timesteps mean and N is the number of pedestrians.
+
+    operations = []
+    for operation in specification.split(","):
+        name, _, argument = operation.strip().partition(":")
+        argument = argument.strip() or None
+
+        if name not in DERIVE_OPERATIONS:
+            raise InvalidOptionError(f"Unknown derive operation {name}. Available operations: {', '.join(DERIVE_OPERATIONS)}.")
+        if name == "normalize" and argument not in (None, *NORMALIZATIONS):
+            raise InvalidOptionError(f"Unknown normalization {argument}. Available normalizations: {', '.join(NORMALIZATIONS)}.")
+        if name in ("difference", "ratio") and argument is not None and not argument.isdigit():
+            raise InvalidOptionError(f"The argument of {name} must be the number of the reference data set, not {argument}.")
+
+        operations.append((name, argument))
+
+    return operations
+
+def stack_data_sets(data_vector):
+    """
+        Stack the data sets of a configuration file into a single 2 dimension array, with one row per data set.
+        Data sets shorter than the longest one are padded with NaN, which is not drawn.
+
+        Args:
+            data_vector (list[lists] | DataSets): the data sets.
+        Returns:
+            np.ndarray: a float array with one row for each data set.
+    """
+
+    if isinstance(data_vector, DataSets):
+        return data_vector.padded(np.nan)
+
+    lengths = [len(data_set) for data_set in data_vector]
+    if len(set(lengths)) <= 1:
+        return np.array(data_vector, dtype=float).reshape(len(data_vector), lengths[0] if lengths else 0)
+
+    stacked = np.full((len(data_vector), max(lengths)), np.nan)
+    for row, data_set in enumerate(data_vector):
+        stacked[row, :len(data_set)] = data_set
+
+    return stacked
+
+def get_legend_parameters(legends, name=None):
+    """
+        Extract the value of a parameter from the legend of each data set, such as N from "N=100".
+
+        Args:
+            legends (list): the legends of each data set.
+            name (str | None): the name of the parameter. If None, the value after the first '=' of each legend is taken.
+        Returns:
+            np.ndarray: a float array with the value of the parameter in each legend.
+        Raises:
+            InvalidDataError: if a legend doesn't define the parameter.
+    """
+
+    pattern = re.compile((rf"(?<![\w.]){re.escape(name)}" if name is not None else "") + r"\s*=\s*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)")
+
+    values = np.empty(len(legends))
+    for index, legend in enumerate(legends):
+        match = pattern.search(legend) if legend is not None else None
+        if match is None:
+            raise InvalidDataError(f"The legend of data set {index + 1} ({legend}) doesn't define {name if name is not None else 'a parameter'} as in {name or 'N'}=value.")
+
+        values[index] = float(match.group(1))
+
+    return values
+
+def derive_data_sets(legends, data_vector, operations):
+    """
+        Compute series derived from the data sets of a configuration file. Every operation works on all data sets at once, stacked as rows of an array:
+            - difference: the difference between consecutive pairs of data sets (first - second, third - fourth, ...), or, with the number of a reference
+                          data set as argument (difference:1), the difference between every other data set and the reference one.
+            - ratio: like difference, but dividing the data sets.
+            - quotient: each data set divided by a parameter taken from its legend, named by the argument (quotient:N divides by 100 the data set
+                        whose legend is N=100). Without argument, the value after the first '=' of each legend is used.
+            - normalize: each data set divided by its maximum (normalize or normalize:max), first value (normalize:first), sum (normalize:sum)
+                         or mean (normalize:mean).
+        Pairwise operations keep the legend of the first data set of each pair, and operations against a reference data set drop it.
 
         Args:
-            legends (list): the legends of each data set. They will be used to extract the N values.
-            data_vector (list[lists]): a list with the data sets
+            legends (list): the legends of each data set.
+            data_vector (list[lists] | DataSets | np.ndarray): the data sets.
+            operations (list): the operations, applied in order, as returned by parse_derive_operations.
         Returns:
-            list: containing the T/N quotient for each data set.
+            tuple: a 2-tuple containing the legends and a 2 dimension array with one row for each derived series.
+        Raises:
+            InvalidDataError: if a pairwise operation receives an odd number of data sets, or a legend lacks the parameter of a quotient.
+            InvalidOptionError: if a reference data set doesn't exist.
     """
 
-    number_pedestrians = []
-    for l in legends:
-        _, n = l.split("=")
-        number_pedestrians.append(int(n))
+    series = stack_data_sets(data_vector) if not isinstance(data_vector, np.ndarray) else data_vector.astype(float)
+    legends = list(legends)
+
+    with np.errstate(divide="ignore", invalid="ignore"): # divisions by zero are drawn as gaps
+        for name, argument in operations:
+            if name in ("difference", "ratio"):
+                if argument is None:
+                    if len(series) % 2 != 0:
+                        raise InvalidDataError(f"The number of data sets must be even.")
+
+                    first, second = series[0::2], series[1::2]
+                    legends = legends[0::2]
+                else:
+                    reference = int(argument) - 1
+                    if not 0 <= reference < len(series):
+                        raise InvalidOptionError(f"There is no data set {argument} to be used as reference.")
+
+                    first, second = np.delete(series, reference, axis=0), series[reference]
+                    legends = legends[:reference] + legends[reference + 1:]
+
+                series = first - second if name == "difference" else first / second
+            elif name == "quotient":
+                series = series / get_legend_parameters(legends, argument)[:, np.newaxis]
+            elif name == "normalize":
+                if argument in (None, "max"):
+                    divisors = np.nanmax(series, axis=1) if series.shape[1] > 0 else np.ones(len(series))
+                elif argument == "first":
+                    divisors = series[:, 0]
+                elif argument == "sum":
+                    divisors = np.nansum(series, axis=1)
+                else:
+                    divisors = np.nanmean(series, axis=1)
 
-    quotient_data_vector = []
-    for data_set, n in zip(data_vector, number_pedestrians):
-        quotient_data_vector.append([t / n for t in data_set])
+                series = series / divisors[:, np.newaxis]
 
-    return quotient_data_vector
\ No newline at end of file
+    return legends, series
@@ -0,0 +1,190 @@
+import contextlib
+import cProfile
+import csv
+import json
+import marshal
+import time
+import tracemalloc
+
+PROFILING_ENABLED = False
+CPROFILE_ENABLED = False
+
+current_figure = ""
+records = [] # one dict per executed stage
+hottest_stage = None # (wall time, figure, stage, cProfile statistics) of the slowest stage profiled with cProfile
+
+def enable_profiling(cprofile=False):
+    """
+        Enable the recording of the stages executed from now on.
+
+        Args:
+            cprofile (bool): Indicates if each stage should also run under cProfile, so the statistics of the slowest one can be saved.
+        Returns:
+            None
+    """
+
+    global PROFILING_ENABLED, CPROFILE_ENABLED
+
+    PROFILING_ENABLED = True
+    CPROFILE_ENABLED = cprofile
+
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+def set_current_figure(figure):
+    """
+        Set the name (usually the output file) of the figure to which the next stages belong.
+    """
+
+    global current_figure
+
+    current_figure = figure
+
+def read_bytes():
+    """
+        Return the number of bytes read by the process so far, or None if it can't be determined (only available on Linux).
+    """
+
+    try:
+        with open("/proc/self/io") as file:
+            for line in file:
+                if line.startswith("rchar:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+
+    return None
+
+@contextlib.contextmanager
+def stage(name):
+    """
+        Context manager that records the wall time, CPU time, bytes read and peak traced memory of a stage of the current figure.
+        Does nothing if profiling is not enabled. Stages must not be nested.
+
+        Yields a dict where the stage can leave the size of the file it wrote, as "output_bytes" (used by savefig).
+
+        Args:
+            name (str): The name of the stage (parse, derive, artists or savefig).
+    """
+
+    global hottest_stage
+
+    details = {}
+
+    if not PROFILING_ENABLED:
+        yield details
+        return
+
+    profiler = cProfile.Profile() if CPROFILE_ENABLED else None
+    tracemalloc.reset_peak()
+    bytes_before = read_bytes()
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+
+    if profiler is not None:
+        profiler.enable()
+
+    try:
+        yield details
+    finally:
+        if profiler is not None:
+            profiler.disable()
+
+        wall_time = time.perf_counter() - wall_start
+        cpu_time = time.process_time() - cpu_start
+        bytes_after = read_bytes()
+
+        records.append({
+            "figure": current_figure,
+            "stage": name,
+            "wall_seconds": wall_time,
+            "cpu_seconds": cpu_time,
+            "bytes_read": bytes_after - bytes_before if bytes_before is not None and bytes_after is not None else None,
+            "peak_memory_bytes": tracemalloc.get_traced_memory()[1],
+            "output_bytes": details.get("output_bytes"),
+        })
+
+        if profiler is not None and (hottest_stage is None or wall_time > hottest_stage[0]):
+            profiler.create_stats()
+            hottest_stage = (wall_time, current_figure, name, profiler.stats)
+
+def collect():
+    """
+        Return and forget the records and the hottest stage gathered so far. Used to send them from worker processes to the main process.
+
+        Returns:
+            tuple: A 2-tuple with the list of records and the hottest stage (or None).
+    """
+
+    global records, hottest_stage
+
+    collected = (records, hottest_stage)
+    records = []
+    hottest_stage = None
+
+    return collected
+
+def print_report(all_records):
+    """
+        Print the records of every stage, followed by the totals of each stage and of each figure, slowest first, and by the encoding time and
+        size of each output file.
+
+        Args:
+            all_records (list): The records gathered from every figure.
+        Returns:
+            None
+    """
+
+    megabytes = lambda value: f"{value / 2 ** 20:10.2f}" if value is not None else f"{'-':>10}"
+
+    print(f"\n{'Figure':<40} {'Stage':<10} {'Wall (s)':>10} {'CPU (s)':>10} {'Read (MB)':>10} {'Peak (MB)':>10}")
+    for record in all_records:
+        print(f"{record['figure'][-40:]:<40} {record['stage']:<10} {record['wall_seconds']:10.4f} {record['cpu_seconds']:10.4f} {megabytes(record['bytes_read'])} {megabytes(record['peak_memory_bytes'])}")
+
+    for key, title in (("stage", "Stage"), ("figure", "Figure")):
+        totals = {}
+        for record in all_records:
+            total = totals.setdefault(record[key], [0.0, 0.0])
+            total[0] += record["wall_seconds"]
+            total[1] += record["cpu_seconds"]
+
+        overall = sum(total[0] for total in totals.values()) or 1.0
+        print(f"\n{title + ' totals':<40} {'Wall (s)':>10} {'CPU (s)':>10} {'Share':>10}")
+        for name, (wall_time, cpu_time) in sorted(totals.items(), key=lambda item: -item[1][0]):
+            print(f"{name[-40:]:<40} {wall_time:10.4f} {cpu_time:10.4f} {wall_time / overall:10.1%}")
+
+    outputs = [record for record in all_records if record["stage"] == "savefig" and record.get("output_bytes") is not None]
+    if outputs:
+        print(f"\n{'Encoded outputs':<40} {'Encode (s)':>10} {'Size (MB)':>10} {'MB/s':>10}")
+        for record in sorted(outputs, key=lambda record: -record["wall_seconds"]):
+            rate = record["output_bytes"] / 2 ** 20 / record["wall_seconds"] if record["wall_seconds"] > 0 else 0.0
+            print(f"{record['figure'][-40:]:<40} {record['wall_seconds']:10.4f} {megabytes(record['output_bytes'])} {rate:10.2f}")
+
+def write_report(all_records, filename):
+    """
+        Write the records of every stage to FILENAME, as CSV if its extension is .csv and as JSON otherwise.
+    """
+
+    with open(filename, "w", newline="") as file:
+        if filename.endswith(".csv"):
+            writer = csv.DictWriter(file, fieldnames=["figure", "stage", "wall_seconds", "cpu_seconds", "bytes_read", "peak_memory_bytes", "output_bytes"])
+            writer.writeheader()
+            writer.writerows(all_records)
+        else:
+            json.dump(all_records, file, indent=4)
+
+def write_hottest_stage(hottest, filename):
+    """
+        Save the cProfile statistics of the hottest stage in the format of cProfile.Profile.dump_stats, readable by pstats.
+
+        Args:
+            hottest (tuple): The hottest stage, as gathered by stage().
+            filename (str): The name of the statistics file.
+        Returns:
+            None
+    """
+
+    with open(filename, "wb") as file:
+        marshal.dump(hottest[3], file)
+
+    print(f"cProfile statistics of the slowest stage ({hottest[2]} of {hottest[1]}, {hottest[0]:.4f} s) saved to {filename}")
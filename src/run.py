@@ -1,10 +1,15 @@
 import time
 import argparse
+import os
 import sys
-from matplotlib import pyplot as plt
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-import plotting
+import api
+import build
+import manifest
 import processing
+import profiling
+from errors import PlotterError
 
 def creating_arg_parser():
 
@@ -16,10 +21,8 @@ def creating_arg_parser():
     parser = argparse.ArgumentParser(description=description, epilog=epilog)
 
     # add_argument adds new arguments or options that can be inserted by command line.
-    parser.add_argument('-i', required=True, nargs=1, help="Filename that contains the data from which the graphic will be generated.")
-    possible_graphics = ["environment_heatmap", "3d_environment_heatmap", "heatmap", "int_contours", "float_contours", "line_graphic",
-                         "scatter_graphic", "varas_door_width_7", "varas_door_width_9"]
-    parser.add_argument('-g','--graphic', choices=possible_graphics, required=True, nargs=1, help="Specifies which graphic should be generated.")
+    parser.add_argument('-i', nargs="+", help="Filename that contains the data from which the graphic will be generated. Several files of an environment_heatmap, heatmap or contours graphic are drawn as the panels of a single figure, with a shared color scale and colorbar.")
+    parser.add_argument('-g','--graphic', choices=api.GRAPHICS, nargs=1, help="Specifies which graphic should be generated.")
     parser.add_argument('-o','--out', nargs="?", default="", help="Filename on which the graphic should be saved.")
     parser.add_argument('-t','--title', nargs=1, help="The title of the generated graphic.")
     parser.add_argument('-x', '--xlabel', nargs=1, help="X-axis label")
@@ -30,62 +33,441 @@ def creating_arg_parser():
     parser.add_argument('--only-save-fig', action='store_true', help="Doesn't show the generated graphic.")
     parser.add_argument('--wall-threshold', nargs=1, default=[1000.0], help="Threshold value above (or bellow, if negative) which a cell is considered a wall or obstacle. The threshold value itself is also treated as a wall.")
     parser.add_argument('--no-marker', action='store_true', help="Data points are no marked in a line graphic.")
+    parser.add_argument('--full-resolution', action='store_true', help="Draw every cell of heatmaps and 3D heatmaps, even when the matrix is larger than the pixels available in the figure.")
+    parser.add_argument('--error-band', choices=processing.ERROR_BANDS, nargs=1, help="Draw a shaded band around each line of a line_graphic: the mean plus and minus the standard deviation (std), the standard error (sem) or the 95%% confidence interval (ci), or the range of the replicates (minmax).")
+    parser.add_argument('--derive', nargs=1, help="Plot series derived from the data sets of a line_graphic or scatter_graphic, computed by comma separated operations applied in order: difference (of consecutive pairs, or difference:K against data set K), ratio (likewise), quotient:NAME (by the NAME=value parameter of each legend) and normalize[:max|first|sum|mean]. For example: --derive difference,normalize:first.")
+    parser.add_argument('--dtype', choices=api.DTYPES, nargs=1, default=["float64"], help="Type in which the parsed data is kept. int32 and float32 take half the memory of float64 (the default) in large batches, and int32 rounds the data to integers.")
+    parser.add_argument('--grid-columns', nargs=1, type=int, help="Number of columns of the grid of panels drawn from several input files. Defaults to up to 3.")
+    parser.add_argument('--panel-titles', nargs="+", help="Title of each panel of the grid drawn from several input files. Defaults to (a), (b), ...")
+    parser.add_argument('--dpi', nargs=1, type=float, help="Resolution of the graphics, in dots per inch. In vector outputs (pdf, svg, eps and ps), the resolution of their rasterized parts. Defaults to 100.")
+    parser.add_argument('--png-compression', nargs=1, type=int, choices=range(10), help="zlib compression level (0-9) of PNG outputs. Lower levels encode faster into larger files. Defaults to 6.")
+    parser.add_argument('--no-rasterize', action='store_true', help="Keep the filled contours, images and surfaces of vector outputs (pdf, svg, eps and ps) as vectors, instead of rasterizing them while the axes and text stay vectors.")
+    parser.add_argument('--frame-duration', nargs=1, type=int, default=[100], help="Time, in milliseconds, each frame of an environment_heatmap_animation is displayed. Defaults to 100.")
+    parser.add_argument('-m', '--manifest', nargs=1, help="Manifest file listing the options of several graphics to be generated in a single run. When given, -i and -g are taken from each job of the manifest.")
+    parser.add_argument('-j', '--jobs', nargs=1, type=int, default=[1], help="Number of processes used to generate the graphics of a manifest in parallel. Parallel jobs never show the generated graphics.")
+    parser.add_argument('--incremental', action='store_true', help="Only generate the graphics whose output file is missing or whose input files or options changed since they were last generated in incremental mode. The state is kept in out/.build_state.json.")
+    parser.add_argument('--profile', action='store_true', help="Record the wall time, CPU time, bytes read and peak memory of each stage (parse, derive, artists and savefig) of each graphic, and print a report at the end, along with the encoding time and size of each output file.")
+    parser.add_argument('--profile-out', nargs=1, help="Also write the profiling records to the given file, as CSV if its extension is .csv and as JSON otherwise. Implies --profile.")
+    parser.add_argument('--profile-cprofile', nargs=1, help="Run each stage under cProfile and save the statistics of the slowest one to the given file (readable by pstats). Implies --profile.")
+    parser.add_argument('--no-cache', action='store_true', help="Don't read or store parsed input data in the on-disk cache (.cache/processing).")
+    parser.add_argument('--clear-cache', action='store_true', help="Remove every entry of the on-disk caches of parsed input data and of rendered graphics before running. Can be used without -i and -g.")
+    parser.add_argument('--cache-size', nargs=1, type=int, default=[512], help="Size limit, in megabytes, of the on-disk cache of parsed input data. The least recently used entries are evicted first. Defaults to 512.")
+    parser.add_argument('--no-output-cache', action='store_true', help="Always render the graphics, instead of reusing a graphic previously rendered from the same input contents and options (.cache/outputs).")
+    parser.add_argument('--output-cache-size', nargs=1, type=int, default=[1024], help="Size limit, in megabytes, of the on-disk cache of rendered graphics. The least recently used graphics are evicted first. Defaults to 1024.")
 
     return parser
 
-def generate_graphic():
-    if choice == "environment_heatmap":
-        x_axis_ticks, y_axis_ticks, _, data_matrix, maximum_value = processing.process_env_heatmap_data(input_file, wall_threshold, "2d", suppress_heatmap_exits)
-        plotting.plot_heatmap(x_axis_ticks, y_axis_ticks, data_matrix, (0, maximum_value), output_file, labels, over_value_color="white", origin="upper")
-    elif choice == "3d_environment_heatmap":
-        x_axis_ticks, y_axis_ticks, z_axis_ticks, data_matrix, maximum_value = processing.process_env_heatmap_data(input_file, wall_threshold, "3d", suppress_heatmap_exits)
-        plotting.plot_3d_heatmap(x_axis_ticks, y_axis_ticks, z_axis_ticks, data_matrix, (0, maximum_value), output_file, labels, over_value_color="none")
-    elif choice == "heatmap":
-        (data_matrix, min_max_values) = processing.process_heatmap_data(input_file, ignore_marked_data, "int", force_over_values)
-        plotting.plot_heatmap(([],[]), ([],[]), data_matrix, min_max_values, output_file, labels)
-    elif choice == "int_contours":
-        (data_matrix, min_max_values) = processing.process_heatmap_data(input_file, ignore_marked_data, "int", force_over_values)
-        plotting.plot_contours_graphic(data_matrix, min_max_values, output_file, labels, "int")
-    elif choice == "float_contours":
-        (data_matrix, min_max_values) = processing.process_heatmap_data(input_file, ignore_marked_data, "float", force_over_values)
-        plotting.plot_contours_graphic(data_matrix, min_max_values, output_file, labels, "float")
-    elif choice == "line_graphic":
-        x_axis_ticks, y_axis_ticks, legends, data_vector = processing.process_configuration_file(input_file)
-        plotting.plot_line_graphic(x_axis_ticks, y_axis_ticks, legends, data_vector, output_file, labels, False, no_marker)
-    elif choice == "scatter_graphic":
-        x_axis_ticks, y_axis_ticks, legends, data_vector = processing.process_configuration_file(input_file)
-        plotting.plot_scatter_graphic(x_axis_ticks, y_axis_ticks, legends, data_vector, output_file, labels)
-    elif choice == "varas_door_width_7":
-        x_axis_ticks, y_axis_ticks, legends, data_vector = processing.process_configuration_file(input_file)
-        processed_legends, difference_data_vector = processing.varas_door_width_fig_7(legends, data_vector)
-        plotting.plot_line_graphic(x_axis_ticks, y_axis_ticks, processed_legends, difference_data_vector, output_file, labels, False)
-    elif choice == "varas_door_width_9":
-        x_axis_ticks, y_axis_ticks, legends, data_vector = processing.process_configuration_file(input_file)
-        quotient_data_vector = processing.varas_door_width_fig_9(legends, data_vector)
-        plotting.plot_line_graphic(x_axis_ticks, y_axis_ticks, legends, quotient_data_vector, output_file, labels, True)
-    else:
-        sys.stderr.write("Invalid graphic.\n")
-        exit()
+def get_job_options(command_line):
+    """
+        Extract the options of a single graphic from the parsed command line.
+
+        Args:
+            command_line (argparse.Namespace): The parsed command line of a single graphic.
+        Returns:
+            dict: The keyword arguments to be passed to generate_graphic.
+    """
 
-if __name__ == "__main__":
-    command_line = creating_arg_parser().parse_args()
-    
-    input_file = command_line.i[0]
     choice = command_line.graphic[0]
-    output_file = command_line.out if command_line.out != "" else f"{choice}_{time.strftime('%Y-%m-%d_%H:%M:%S')}.png"
-    
-    labels = [command_line.title[0] if command_line.title is not None else "",
-              command_line.xlabel[0] if command_line.xlabel is not None else "",
-              command_line.ylabel[0] if command_line.ylabel is not None else ""]
-    
-    ignore_marked_data = command_line.ignore_marked_data
-    force_over_values = command_line.force_over_values
-    suppress_heatmap_exits = command_line.suppress_heatmap_exits
-    no_marker = command_line.no_marker
-
-    wall_threshold = float(command_line.wall_threshold[0])
-    
-    generate_graphic()
-
-    if not command_line.only_save_fig:
-        plt.show()  # show the graphic
\ No newline at end of file
+
+    return {
+        "choice": choice,
+        "input_file": command_line.i[0] if len(command_line.i) == 1 else command_line.i,
+        "output_file": command_line.out if command_line.out != "" else f"{choice}_{time.strftime('%Y-%m-%d_%H:%M:%S')}.png",
+        "labels": [command_line.title[0] if command_line.title is not None else "",
+                   command_line.xlabel[0] if command_line.xlabel is not None else "",
+                   command_line.ylabel[0] if command_line.ylabel is not None else ""],
+        "ignore_marked_data": command_line.ignore_marked_data,
+        "force_over_values": command_line.force_over_values,
+        "suppress_heatmap_exits": command_line.suppress_heatmap_exits,
+        "no_marker": command_line.no_marker,
+        "wall_threshold": float(command_line.wall_threshold[0]),
+        "full_resolution": command_line.full_resolution,
+        "frame_duration": command_line.frame_duration[0],
+        "error_band": command_line.error_band[0] if command_line.error_band is not None else None,
+        "derive": command_line.derive[0] if command_line.derive is not None else None,
+        "dtype": command_line.dtype[0],
+        "grid_columns": command_line.grid_columns[0] if command_line.grid_columns is not None else None,
+        "panel_titles": command_line.panel_titles,
+        "dpi": command_line.dpi[0] if command_line.dpi is not None else None,
+        "png_compression": command_line.png_compression[0] if command_line.png_compression is not None else None,
+        "rasterize": not command_line.no_rasterize,
+    }
+
+def parse_job_arguments(parser, arguments):
+    """
+        Parse and validate the command line arguments of a single graphic.
+
+        Args:
+            parser (argparse.ArgumentParser): The parser returned by creating_arg_parser.
+            arguments (list | None): The arguments to be parsed. If None, the arguments of the program are used.
+        Returns:
+            argparse.Namespace: The parsed arguments.
+    """
+
+    command_line = parser.parse_args(arguments)
+
+    if arguments is not None: # a manifest job
+        if command_line.manifest is not None:
+            parser.error("a manifest job can not reference another manifest")
+        if command_line.clear_cache:
+            parser.error("a manifest job can not clear the cache, --clear-cache must be given along with -m")
+
+    only_clearing_cache = command_line.clear_cache and command_line.i is None and command_line.graphic is None
+
+    if command_line.manifest is None and not only_clearing_cache:
+        if command_line.i is None or command_line.graphic is None:
+            parser.error("the following arguments are required: -i, -g/--graphic")
+
+    return command_line
+
+def display_available():
+    """
+        Indicate if an interactive backend can be used. On Linux, it requires an X11 or Wayland display.
+    """
+
+    if sys.platform.startswith("linux"):
+        return "DISPLAY" in os.environ or "WAYLAND_DISPLAY" in os.environ
+
+    return True
+
+def select_backend(only_save_fig):
+    """
+        Select the non-interactive Agg backend when the graphics are only saved or when no display is available, so matplotlib doesn't probe interactive backends for nothing.
+        A backend given through the MPLBACKEND environment variable is kept. Must be called before pyplot is imported.
+
+        Args:
+            only_save_fig (bool): Indicates if the graphics are only saved, never shown.
+    """
+
+    import matplotlib
+
+    if "MPLBACKEND" not in os.environ and (only_save_fig or not display_available()):
+        matplotlib.use("Agg")
+
+def initialize_worker(cache_settings, profiling_settings):
+    """
+        Initialize a worker process of a parallel batch: selects a non-interactive matplotlib backend and applies the cache and profiling settings of the main process.
+
+        Args:
+            cache_settings (tuple): The enabled, directory and size_limit arguments of processing.configure_cache.
+            profiling_settings (tuple): Indicates if profiling is enabled and if cProfile should be used.
+    """
+
+    import matplotlib
+
+    matplotlib.use("Agg")
+    processing.configure_cache(*cache_settings)
+
+    if profiling_settings[0]:
+        profiling.enable_profiling(profiling_settings[1])
+
+def describe_error(exception):
+    """
+        Return the message shown when a graphic can't be generated. Unexpected errors, e.g. an output file that can't be written, are prefixed with their type.
+    """
+
+    if isinstance(exception, PlotterError):
+        return str(exception)
+
+    return f"{type(exception).__name__}: {exception}"
+
+def report_failure(output_file, error):
+    """
+        Print the error message of a graphic generated by a single run, along with its output file.
+    """
+
+    sys.stderr.write(f"out/{output_file}: {error}\n")
+
+def render_job(options, show=False):
+    """
+        Generate a single graphic of a batch, isolating its failures from the remaining graphics.
+
+        Args:
+            options (dict): The keyword arguments to be passed to generate_graphic.
+            show (bool): Indicates if the generated graphic should be shown before its figures are closed.
+        Returns:
+            tuple: A 3-tuple containing the output file of the job, the error message (None if the graphic was generated)
+                   and the profiling information collected by profiling.collect (None if profiling is disabled).
+    """
+
+    from matplotlib import pyplot as plt
+    import plotting
+
+    profiling.set_current_figure(options["output_file"])
+    plotting.use_templates(not show) # figures that are only saved can reuse the figure of a previous graphic
+
+    error = None
+    try:
+        generate_graphic(**options)
+
+        if show:
+            plt.show()
+    except Exception as exception:
+        error = describe_error(exception)
+    finally:
+        plt.close("all")  # keeps the memory usage flat along the batch
+
+    return options["output_file"], error, profiling.collect() if profiling.PROFILING_ENABLED else None
+
+def print_batch_summary(results):
+    """
+        Print whether each job of a batch succeeded or failed.
+
+        Args:
+            results (list): A list of 3-tuples as returned by render_job, in the order of the manifest.
+        Returns:
+            int: The number of failed jobs.
+    """
+
+    failed = [result for result in results if result[1] is not None]
+
+    print(f"Summary: {len(results) - len(failed)} succeeded, {len(failed)} failed.")
+    for output_file, error, _ in results:
+        if error is None:
+            print(f"  [ok]     {output_file}")
+        else:
+            print(f"  [failed] {output_file}: {error}")
+
+    return len(failed)
+
+def run_jobs(jobs, options, number_of_jobs):
+    """
+        Generate the given graphics within the current interpreter, or spread them over a process pool.
+
+        Args:
+            jobs (list): The parsed command line of each graphic.
+            options (list): The keyword arguments of generate_graphic for each graphic.
+            number_of_jobs (int): The number of worker processes. With a single job the graphics are generated by the current process.
+        Returns:
+            list: A list of 3-tuples as returned by render_job, in the order of the given graphics.
+    """
+
+    if number_of_jobs <= 1:
+        results = []
+        for job_number, (command_line, job_options) in enumerate(zip(jobs, options), start=1):
+            if len(jobs) > 1:
+                print(f"Generating Graphics: {job_number}/{len(jobs)} ({job_options['output_file']})")
+            results.append(render_job(job_options, not command_line.only_save_fig))
+
+        import plotting
+        plotting.release_templates()
+
+        return results
+
+    results = [None] * len(jobs)
+    cache_settings = (processing.CACHE_ENABLED, processing.CACHE_DIRECTORY, processing.CACHE_SIZE_LIMIT)
+    profiling_settings = (profiling.PROFILING_ENABLED, profiling.CPROFILE_ENABLED)
+    with ProcessPoolExecutor(max_workers=number_of_jobs, initializer=initialize_worker, initargs=(cache_settings, profiling_settings)) as executor:
+        futures = {executor.submit(render_job, job_options): index for index, job_options in enumerate(options)}
+
+        for finished, future in enumerate(as_completed(futures), start=1):
+            index = futures[future]
+            try:
+                results[index] = future.result()
+            except Exception as error: # the worker process itself died
+                results[index] = (options[index]["output_file"], repr(error), None)
+
+            if len(jobs) > 1:
+                print(f"Generated Graphics: {finished}/{len(jobs)} ({results[index][0]})")
+
+    return results
+
+def run_cached_jobs(jobs, options, number_of_jobs):
+    """
+        Generate the given graphics, reusing the outputs previously rendered from the same input contents and options (see build.get_output_key),
+        which are hard linked (or copied) to the requested output files instead of being rendered again. Graphics that are shown are always rendered.
+
+        Args:
+            jobs (list): The parsed command line of each graphic.
+            options (list): The keyword arguments of generate_graphic for each graphic.
+            number_of_jobs (int): The number of worker processes.
+        Returns:
+            list: A list of 3-tuples as returned by render_job, in the order of the given graphics. Reused graphics have no profiling information.
+    """
+
+    file_hashes = build.load_output_file_hashes()
+    keys = [build.get_output_key(job_options, file_hashes) if number_of_jobs > 1 or command_line.only_save_fig else None
+            for command_line, job_options in zip(jobs, options)]
+
+    results = [None] * len(jobs)
+    saved_bytes = 0
+    for index, key in enumerate(keys):
+        size = build.restore_output(key, f"out/{options[index]['output_file']}") if key is not None else None
+        if size is not None:
+            results[index] = (options[index]["output_file"], None, None)
+            saved_bytes += size
+
+    pending = [index for index, result in enumerate(results) if result is None]
+    if len(pending) < len(jobs) and len(jobs) > 1:
+        print(f"Reusing {len(jobs) - len(pending)} cached graphics ({saved_bytes / 2 ** 20:.2f} MB not rendered again).")
+
+    rendered = run_jobs([jobs[index] for index in pending], [options[index] for index in pending], number_of_jobs) if pending else []
+
+    for index, result in zip(pending, rendered):
+        results[index] = result
+        if result[1] is None and keys[index] is not None:
+            build.store_output(keys[index], f"out/{result[0]}")
+
+    build.save_output_file_hashes(file_hashes)
+
+    return results
+
+def render_jobs(jobs, options, number_of_jobs):
+    """
+        Generate the given graphics with run_cached_jobs, or with run_jobs if the output cache is disabled. Arguments and result as in run_jobs.
+    """
+
+    if build.OUTPUT_CACHE_ENABLED:
+        return run_cached_jobs(jobs, options, number_of_jobs)
+
+    return run_jobs(jobs, options, number_of_jobs)
+
+def run_incremental_jobs(jobs, options, number_of_jobs):
+    """
+        Generate only the graphics that are not up to date, recording the signature of the generated ones in the build state.
+
+        Args:
+            jobs (list): The parsed command line of each graphic.
+            options (list): The keyword arguments of generate_graphic for each graphic.
+            number_of_jobs (int): The number of worker processes.
+        Returns:
+            list: A list of 3-tuples as returned by render_job, for the graphics that were not up to date.
+    """
+
+    build_state = build.load_build_state()
+    signatures = [build.get_job_signature(job_options, build_state) for job_options in options]
+    pending = [index for index, job_options in enumerate(options) if not build.is_up_to_date(job_options, signatures[index], build_state)]
+
+    print(f"Skipping {len(options) - len(pending)} up-to-date graphics.")
+
+    results = render_jobs([jobs[index] for index in pending], [options[index] for index in pending], number_of_jobs)
+
+    for index, (output_file, error, _) in zip(pending, results):
+        if error is None and signatures[index] is not None:
+            build_state["outputs"][output_file] = signatures[index]
+        else:
+            build_state["outputs"].pop(output_file, None)
+
+    build.save_build_state(build_state)
+
+    return results
+
+def run_manifest(parser, manifest_file, number_of_jobs=1, incremental=False):
+    """
+        Generate every graphic listed in a manifest within the current interpreter, or spread them over a process pool.
+
+        Args:
+            parser (argparse.ArgumentParser): The parser used to validate the arguments of each job.
+            manifest_file (str): The name of the manifest file.
+            number_of_jobs (int): The number of worker processes. With a single job the graphics are generated by the current process.
+            incremental (bool): Indicates if graphics that are up to date should be skipped.
+        Returns:
+            list: A list of 3-tuples as returned by render_job, for the generated graphics.
+    """
+
+    jobs = [parse_job_arguments(parser, arguments) for arguments in manifest.read_manifest(manifest_file)]
+    options = [get_job_options(command_line) for command_line in jobs]
+
+    select_backend(number_of_jobs > 1 or all(command_line.only_save_fig for command_line in jobs))
+
+    if incremental:
+        return run_incremental_jobs(jobs, options, number_of_jobs)
+
+    return render_jobs(jobs, options, number_of_jobs)
+
+def report_profiling(command_line, profiles):
+    """
+        Print and save the profiling information gathered from every graphic.
+
+        Args:
+            command_line (argparse.Namespace): The parsed command line, with the --profile-out and --profile-cprofile options.
+            profiles (list): The profiling information of each graphic, as returned by profiling.collect (None entries are ignored).
+        Returns:
+            None
+    """
+
+    all_records = []
+    hottest = None
+    for profile in profiles:
+        if profile is None:
+            continue
+
+        records, hottest_stage = profile
+        all_records.extend(records)
+        if hottest_stage is not None and (hottest is None or hottest_stage[0] > hottest[0]):
+            hottest = hottest_stage
+
+    profiling.print_report(all_records)
+
+    if command_line.profile_out is not None:
+        profiling.write_report(all_records, command_line.profile_out[0])
+    if command_line.profile_cprofile is not None and hottest is not None:
+        profiling.write_hottest_stage(hottest, command_line.profile_cprofile[0])
+
+def generate_graphic(choice, input_file, output_file, labels, **options):
+    """
+        Process the input file and plot the selected graphic into out/ (see api.render). The pyplot figures are kept open, so they can be shown.
+
+        Args:
+            choice (str): The graphic to be generated. One of the choices of the -g option.
+            input_file (str | list): The name of the data or configuration file, or the data files of the panels of a grid.
+            output_file (str): The name of the file, inside out/, where the graphic will be saved.
+            labels (list): The title, x-axis label and y-axis label of the graphic.
+            options: The remaining options of the graphic, as returned by get_job_options.
+        Returns:
+            None
+    """
+
+    build.detach_output(f"out/{output_file}") # never overwrite a cached graphic through a hard link
+    api.render(choice, input_file, f"out/{output_file}", labels, close_figures=False, **options)
+
+if __name__ == "__main__":
+    parser = creating_arg_parser()
+    command_line = parse_job_arguments(parser, None)
+
+    processing.configure_cache(enabled=not command_line.no_cache, size_limit=command_line.cache_size[0] * 2 ** 20)
+    build.configure_output_cache(enabled=not command_line.no_output_cache, size_limit=command_line.output_cache_size[0] * 2 ** 20)
+    if command_line.clear_cache:
+        processing.clear_cache()
+        build.clear_output_cache()
+
+    if command_line.profile or command_line.profile_out is not None or command_line.profile_cprofile is not None:
+        profiling.enable_profiling(cprofile=command_line.profile_cprofile is not None)
+
+    results = []
+    try:
+        if command_line.manifest is not None:
+            results = run_manifest(parser, command_line.manifest[0], command_line.jobs[0], command_line.incremental)
+            print_batch_summary(results)
+        elif command_line.incremental or (command_line.only_save_fig and build.OUTPUT_CACHE_ENABLED):
+            select_backend(command_line.only_save_fig)
+            run_single_job = run_incremental_jobs if command_line.incremental else render_jobs
+            results = run_single_job([command_line], [get_job_options(command_line)], 1)
+            if results and results[0][1] is not None:
+                report_failure(results[0][0], results[0][1])
+        elif command_line.graphic is not None:
+            select_backend(command_line.only_save_fig)
+            options = get_job_options(command_line)
+
+            profiling.set_current_figure(options["output_file"])
+            try:
+                generate_graphic(**options)
+            except Exception as exception:
+                report_failure(options["output_file"], describe_error(exception))
+                sys.exit(1)
+
+            if profiling.PROFILING_ENABLED:
+                results = [(options["output_file"], None, profiling.collect())]
+
+            if not command_line.only_save_fig:
+                from matplotlib import pyplot as plt
+                plt.show()  # show the graphic
+    except PlotterError as error:
+        sys.stderr.write(f"{error}\n")
+        sys.exit(1)
+
+    if profiling.PROFILING_ENABLED:
+        report_profiling(command_line, [profile for _, _, profile in results])
+
+    if any(error is not None for _, error, _ in results):
+        sys.exit(1)
@@ -0,0 +1,337 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import shlex
+import socketserver
+import threading
+import time
+from collections import OrderedDict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+import numpy as np
+
+import api
+import build
+import manifest
+import run
+from errors import InputNotFoundError, InvalidOptionError, PlotterError
+
+CONTENT_TYPES = {
+    "png": "image/png",
+    "apng": "image/apng",
+    "gif": "image/gif",
+    "svg": "image/svg+xml",
+    "pdf": "application/pdf",
+    "eps": "application/postscript",
+    "ps": "application/postscript",
+    "jpg": "image/jpeg",
+    "jpeg": "image/jpeg",
+}
+LATENCY_SAMPLES = 1024 # number of recent requests of each kind kept to compute the latency percentiles
+
+MEMORY_CACHE_SIZE_LIMIT = 256 * 2 ** 20 # in bytes
+
+render_lock = threading.Lock() # matplotlib isn't thread-safe, so graphics are parsed and rendered one at a time
+render_cache = OrderedDict() # request key -> (input state, image bytes, content type), least recently used first
+render_cache_bytes = 0
+counters = {"hits": 0, "misses": 0, "invalidations": 0, "evictions": 0, "errors": 0}
+latencies = {"hit": deque(maxlen=LATENCY_SAMPLES), "miss": deque(maxlen=LATENCY_SAMPLES)} # in seconds
+
+def creating_arg_parser():
+
+    description = 'A long-lived local render server for the graphic generator, which keeps matplotlib loaded and the rendered graphics in memory.'
+    epilog = """Graphics are requested with GET /render?g=heatmap&i=in/data.txt&title=Title (options named like the keys of a manifest job) or with
+    POST /render, whose body is either a JSON manifest job or the options of run.py as typed in the command line. GET /stats returns the counters."""
+
+    parser = argparse.ArgumentParser(description=description, epilog=epilog)
+
+    parser.add_argument('--host', nargs=1, default=["127.0.0.1"], help="Address on which the server listens. Defaults to 127.0.0.1.")
+    parser.add_argument('-p', '--port', nargs=1, type=int, default=[8765], help="TCP port on which the server listens. Defaults to 8765.")
+    parser.add_argument('--socket', nargs=1, help="Listen on this Unix socket instead of a TCP port.")
+    parser.add_argument('--memory-cache-size', nargs=1, type=int, default=[256], help="Size limit, in megabytes, of the in-memory cache of rendered graphics. The least recently used graphics are evicted first. Defaults to 256.")
+
+    return parser
+
+def request_to_arguments(query, body, content_type):
+    """
+        Convert the query string or the body of a render request into the command line arguments of run.py.
+
+        Args:
+            query (str): The query string. Each parameter is an option named like the keys of a manifest job (see manifest.job_to_arguments).
+                         Flags are given without a value, or with true or false. Options repeated in the query receive several values.
+            body (bytes): The body of a POST request, either a JSON manifest job or the options of run.py as typed in the command line.
+            content_type (str): The content type of the body.
+        Returns:
+            list: The command line arguments.
+        Raises:
+            InvalidOptionError: If the body isn't valid JSON.
+    """
+
+    if body:
+        if content_type.startswith("application/json"):
+            try:
+                return manifest.job_to_arguments(json.loads(body))
+            except ValueError as error:
+                raise InvalidOptionError(f"Invalid JSON request: {error}")
+
+        return shlex.split(body.decode())
+
+    flags = {"": True, "true": True, "false": False}
+    job = {}
+    for key, value in parse_qsl(query, keep_blank_values=True):
+        value = flags.get(value.lower(), value)
+        if key in job:
+            job[key] = (job[key] if isinstance(job[key], list) else [job[key]]) + [value]
+        else:
+            job[key] = value
+
+    return manifest.job_to_arguments(job)
+
+def get_render_options(arguments):
+    """
+        Validate the arguments of a render request with the argument parser of run.py.
+
+        Args:
+            arguments (list): The command line arguments of the graphic.
+        Returns:
+            tuple: A 2-tuple with the keyword arguments of api.render (without the output) and the image format, taken from the extension of the -o option (png by default).
+        Raises:
+            InvalidOptionError: If the arguments are rejected by the parser.
+    """
+
+    error_output = io.StringIO()
+    try:
+        with contextlib.redirect_stderr(error_output):
+            command_line = run.parse_job_arguments(run.creating_arg_parser(), arguments)
+    except SystemExit:
+        raise InvalidOptionError(error_output.getvalue().strip().splitlines()[-1] if error_output.getvalue().strip() else "Invalid options.")
+
+    options = run.get_job_options(command_line)
+    image_format = os.path.splitext(options.pop("output_file"))[1][1:].lower() or "png"
+
+    return options, image_format
+
+def get_input_state(options):
+    """
+        Return the modification time and size of every input file of a graphic, which change whenever the graphic must be rendered again.
+
+        Args:
+            options (dict): The keyword arguments of api.render.
+        Returns:
+            tuple | None: A tuple with the path, modification time and size of each input, or None if some input can't be read.
+    """
+
+    try:
+        dependencies = build.get_input_dependencies(options["choice"], options["input_file"])
+
+        state = []
+        for path in dependencies:
+            file_status = os.stat(path)
+            state.append((path, file_status.st_mtime_ns, file_status.st_size))
+            if os.path.isdir(path): # binary data stores
+                state.extend((os.path.join(path, name), os.stat(os.path.join(path, name)).st_mtime_ns) for name in sorted(os.listdir(path)))
+    except OSError:
+        return None
+
+    return tuple(state)
+
+def store_rendered_graphic(key, input_state, image, content_type):
+    """
+        Keep a rendered graphic in the in-memory cache, evicting the least recently used ones while the cache exceeds MEMORY_CACHE_SIZE_LIMIT.
+    """
+
+    global render_cache_bytes
+
+    if key in render_cache:
+        render_cache_bytes -= len(render_cache.pop(key)[1])
+
+    if len(image) > MEMORY_CACHE_SIZE_LIMIT:
+        return
+
+    render_cache[key] = (input_state, image, content_type)
+    render_cache_bytes += len(image)
+
+    while render_cache_bytes > MEMORY_CACHE_SIZE_LIMIT:
+        _, (_, evicted_image, _) = render_cache.popitem(last=False)
+        render_cache_bytes -= len(evicted_image)
+        counters["evictions"] += 1
+
+def render_request(arguments):
+    """
+        Render the graphic described by the arguments of a request, or take it from the in-memory cache if none of its inputs changed since it was rendered.
+
+        Args:
+            arguments (list): The command line arguments of the graphic.
+        Returns:
+            tuple: A 3-tuple with the image bytes, its content type and a bool indicating if it came from the cache.
+        Raises:
+            PlotterError: If the graphic can't be rendered.
+    """
+
+    with render_lock:
+        options, image_format = get_render_options(arguments)
+        key = json.dumps([options, image_format], sort_keys=True)
+        input_state = get_input_state(options)
+
+        cached = render_cache.get(key)
+        if cached is not None and input_state is not None and cached[0] == input_state:
+            render_cache.move_to_end(key)
+            return cached[1], cached[2], True
+
+        if cached is not None:
+            counters["invalidations"] += 1
+
+        choice, input_file, labels = options.pop("choice"), options.pop("input_file"), options.pop("labels")
+        image = api.render(choice, input_file, None, labels, image_format=image_format, **options)
+        content_type = CONTENT_TYPES.get(image_format, "application/octet-stream")
+
+        if input_state is not None:
+            store_rendered_graphic(key, input_state, image, content_type)
+
+        return image, content_type, False
+
+def get_statistics():
+    """
+        Return the counters of the server: cache hits, misses, invalidations (graphics rendered again because an input changed), evictions and errors,
+        the size of the in-memory cache, and the latency of the recent cache hits and misses.
+
+        Returns:
+            dict: The statistics, ready to be serialized as JSON.
+    """
+
+    def summarize(samples):
+        milliseconds = np.array(samples) * 1000
+        if milliseconds.size == 0:
+            return {"samples": 0}
+
+        return {
+            "samples": int(milliseconds.size),
+            "mean_ms": float(milliseconds.mean()),
+            "p50_ms": float(np.percentile(milliseconds, 50)),
+            "p95_ms": float(np.percentile(milliseconds, 95)),
+            "max_ms": float(milliseconds.max()),
+        }
+
+    requests = counters["hits"] + counters["misses"]
+
+    return {
+        **counters,
+        "hit_ratio": counters["hits"] / requests if requests > 0 else None,
+        "entries": len(render_cache),
+        "cached_bytes": render_cache_bytes,
+        "latency": {kind: summarize(list(samples)) for kind, samples in latencies.items()},
+    }
+
+class RenderRequestHandler(BaseHTTPRequestHandler):
+    """Handler of the requests of the render server (GET /render, POST /render and GET /stats)."""
+
+    def address_string(self):
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix-socket"
+
+    def send_body(self, status, body, content_type, headers=()):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_error_message(self, status, message):
+        self.send_body(status, json.dumps({"error": message}).encode(), "application/json")
+
+    def handle_render(self, query, body):
+        start = time.perf_counter()
+        try:
+            image, content_type, hit = render_request(request_to_arguments(query, body, self.headers.get("Content-Type", "")))
+        except PlotterError as error:
+            with render_lock:
+                counters["errors"] += 1
+            self.send_error_message(404 if isinstance(error, InputNotFoundError) else 400, str(error))
+            return
+        except Exception as error:
+            with render_lock:
+                counters["errors"] += 1
+            self.send_error_message(500, repr(error))
+            return
+
+        elapsed = time.perf_counter() - start
+        with render_lock:
+            counters["hits" if hit else "misses"] += 1
+            latencies["hit" if hit else "miss"].append(elapsed)
+
+        self.send_body(200, image, content_type, [("X-Cache", "hit" if hit else "miss"), ("X-Render-Time-Ms", f"{elapsed * 1000:.2f}")])
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+
+        if url.path == "/render":
+            self.handle_render(url.query, b"")
+        elif url.path == "/stats":
+            with render_lock:
+                statistics = get_statistics()
+            self.send_body(200, json.dumps(statistics, indent=4).encode(), "application/json")
+        else:
+            self.send_error_message(404, f"Unknown path {url.path}.")
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+        if url.path == "/render":
+            self.handle_render(url.query, body)
+        else:
+            self.send_error_message(404, f"Unknown path {url.path}.")
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """HTTP server listening on a Unix socket."""
+
+    daemon_threads = True
+
+def create_server(host="127.0.0.1", port=8765, socket_path=None):
+    """
+        Create the render server, listening on a TCP port or on a Unix socket, and load matplotlib, so the first request doesn't pay for it.
+
+        Args:
+            host (str): The address on which the server listens.
+            port (int): The TCP port on which the server listens.
+            socket_path (str | None): If given, the Unix socket on which the server listens instead of the TCP port.
+        Returns:
+            socketserver.BaseServer: The server, ready to serve_forever.
+    """
+
+    import matplotlib
+
+    matplotlib.use("Agg")
+
+    import plotting
+    plotting.use_templates(True) # the graphics are only saved, so the figures of previous graphics can be reused
+
+    if socket_path is not None:
+        if os.path.exists(socket_path):
+            os.remove(socket_path) # left by a previous server
+
+        return ThreadingUnixHTTPServer(socket_path, RenderRequestHandler)
+
+    return ThreadingHTTPServer((host, port), RenderRequestHandler)
+
+if __name__ == "__main__":
+    command_line = creating_arg_parser().parse_args()
+
+    MEMORY_CACHE_SIZE_LIMIT = command_line.memory_cache_size[0] * 2 ** 20
+    socket_path = command_line.socket[0] if command_line.socket is not None else None
+
+    server = create_server(command_line.host[0], command_line.port[0], socket_path)
+    print(f"Serving graphics on {socket_path if socket_path is not None else f'http://{command_line.host[0]}:{command_line.port[0]}'}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if socket_path is not None:
+            os.remove(socket_path)
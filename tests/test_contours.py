@@ -0,0 +1,126 @@
+import os
+import sys
+
+import matplotlib
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+from matplotlib.contour import ContourSet
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import plotting
+import processing
+
+INPUT_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "in")
+
+@pytest.fixture(autouse=True)
+def no_cache(monkeypatch):
+    monkeypatch.setattr(processing, "CACHE_ENABLED", False)
+    plotting.contour_geometries.clear()
+    yield
+    plotting.contour_geometries.clear()
+    plt.close("all")
+
+def render_pixels(draw):
+    """Draw a contour graphic with its colorbar through DRAW(ax) and return its pixels."""
+
+    fig = plt.figure()
+    ax = fig.gca()
+    fig.colorbar(draw(ax))
+    fig.canvas.draw()
+
+    return np.asarray(fig.canvas.buffer_rgba()).copy()
+
+def draw_with_matplotlib(ax, data_matrix, min_max_values, levels):
+    (min_value, max_value) = min_max_values
+
+    ax.contour(data_matrix, vmin=min_value, vmax=max_value, levels=levels, colors="black", origin="lower", extend="both", linewidths=0.5)
+
+    return ax.contourf(data_matrix, vmin=min_value, vmax=max_value, levels=levels, cmap=plotting.set_colormap(), origin="lower", extend="both", antialiased=True)
+
+def door_matrix():
+    data = processing.process_heatmap_data(os.path.join(INPUT_DIRECTORY, "alizadeh", "alizadeh_fig_9b_onlyValid.txt"), True, "int", True)
+    return data.matrix, data.min_max_values, "int"
+
+def random_matrix():
+    matrix = np.random.default_rng(0).random((60, 80)).cumsum(axis=0)
+    return matrix, (matrix.min(), matrix.max()), "float"
+
+def masked_matrix():
+    matrix, min_max_values, data_type = random_matrix()
+    matrix[0:4, 10:20] = np.nan # masked cells on an edge
+    matrix[30:34, 40:44] = np.nan
+    return matrix, min_max_values, data_type
+
+def narrow_range_matrix():
+    matrix, _, data_type = random_matrix()
+    return matrix, (matrix.min() + 5, matrix.max() - 5), data_type # values below and above the levels
+
+@pytest.mark.parametrize("make_matrix", [door_matrix, random_matrix, masked_matrix, narrow_range_matrix])
+def test_draw_contours_matches_matplotlib(make_matrix):
+    data_matrix, min_max_values, data_type = make_matrix()
+    levels = plotting.get_levels(min_max_values, data_type)
+
+    expected = render_pixels(lambda ax: draw_with_matplotlib(ax, data_matrix, min_max_values, levels))
+    traced = render_pixels(lambda ax: plotting.draw_contours(ax, data_matrix, min_max_values, levels))
+    cached = render_pixels(lambda ax: plotting.draw_contours(ax, data_matrix, min_max_values, levels))
+
+    assert len(plotting.contour_geometries) == 1
+    assert np.array_equal(traced, expected)
+    assert np.array_equal(cached, expected)
+
+@pytest.mark.parametrize("make_matrix", [door_matrix, narrow_range_matrix])
+def test_draw_contours_matches_matplotlib_contour_sets(make_matrix):
+    data_matrix, min_max_values, data_type = make_matrix()
+    levels = plotting.get_levels(min_max_values, data_type)
+
+    fig, (expected_ax, traced_ax) = plt.subplots(1, 2)
+    expected_filled = draw_with_matplotlib(expected_ax, data_matrix, min_max_values, levels)
+    traced_filled = plotting.draw_contours(traced_ax, data_matrix, min_max_values, levels)
+    expected_colorbar, traced_colorbar = fig.colorbar(expected_filled, ax=expected_ax), fig.colorbar(traced_filled, ax=traced_ax)
+
+    def line_set(ax):
+        return next(artist for artist in ax.get_children() if isinstance(artist, ContourSet) and not artist.filled)
+
+    for expected, traced in ((expected_filled, traced_filled), (line_set(expected_ax), line_set(traced_ax))):
+        assert traced.extend == expected.extend == "both"
+        assert np.array_equal(traced.levels, expected.levels)
+        assert np.array_equal(traced.layers, expected.layers)
+        assert len(traced.get_paths()) == len(expected.get_paths())
+        for traced_path, expected_path in zip(traced.get_paths(), expected.get_paths()):
+            assert np.array_equal(traced_path.vertices, expected_path.vertices)
+            assert np.array_equal(traced_path.codes if traced_path.codes is not None else [], expected_path.codes if expected_path.codes is not None else [])
+
+    assert traced_colorbar.extend == expected_colorbar.extend == "both"
+    assert np.array_equal(traced_colorbar.get_ticks(), expected_colorbar.get_ticks())
+    assert np.array_equal(traced_colorbar.boundaries, expected_colorbar.boundaries)
+    assert (traced_colorbar.vmin, traced_colorbar.vmax) == (expected_colorbar.vmin, expected_colorbar.vmax)
+    assert traced_ax.get_xlim() == expected_ax.get_xlim() and traced_ax.get_ylim() == expected_ax.get_ylim()
+
+def test_trace_contours_is_cached_on_disk(monkeypatch, tmp_path):
+    monkeypatch.setattr(processing, "CACHE_ENABLED", True)
+    monkeypatch.setattr(processing, "CACHE_DIRECTORY", str(tmp_path))
+
+    data_matrix, min_max_values, data_type = random_matrix()
+    levels = plotting.get_levels(min_max_values, data_type)
+
+    geometry = plotting.trace_contours(data_matrix, levels)
+    plotting.contour_geometries.clear()
+
+    def fail(*args, **kwargs):
+        raise AssertionError("the contours were traced again")
+
+    import contourpy
+    monkeypatch.setattr(contourpy, "contour_generator", fail)
+
+    cached = plotting.trace_contours(data_matrix, levels)
+
+    assert np.array_equal(cached.levels, geometry.levels)
+    assert all(np.array_equal(a[0], b[0]) for a, b in zip(cached.fills, geometry.fills) if a is not None)
+
+def test_trace_contours_rejects_decreasing_levels():
+    with pytest.raises(ValueError):
+        plotting.trace_contours(np.zeros((3, 3)), np.array([0, 0, 1]))